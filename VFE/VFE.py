@@ -1,11 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, font
-import cv2
 import os
+import sys
 import threading
-from datetime import datetime
 import re
-import json
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from VFE.engine import ExtractionError, FrameExtractor
+from VFE.i18n import detect_language, load_language
+from VFE.metrics import format_duration
+from VFE.output import IMAGE_FORMATS, JPEG_QUALITY, PNG_COMPRESSION, OutputSettings, parse_crop, parse_size
 
 
 class VideoFrameExtractor:
@@ -13,7 +19,7 @@ class VideoFrameExtractor:
         self.root = root
         self.language = self.detect_language()
 
-        window_size = "1200x600" if self.language == "en-US" else "900x600"
+        window_size = "1200x680" if self.language == "en-US" else "900x680"
         self.root.geometry(window_size)
         self.root.resizable(True, True)
 
@@ -32,31 +38,21 @@ class VideoFrameExtractor:
         self.processing = False
         self.stop_processing = False
         self.stop_requested = False
+        self.extractor = FrameExtractor(
+            language=self.language,
+            lang=self.lang,
+            on_progress=lambda current, total: self.root.after(10, self.update_progress, current, total)
+        )
 
         self.create_menu()
         self.create_widgets()
         self.setup_style()
 
     def detect_language(self):
-        en_file = os.path.join("Languages", "en-US.json")
-        if os.path.exists(en_file):
-            return "en-US"
-        return "zh-CN"
+        return detect_language()
 
     def load_language_strings(self):
-        lang_file = os.path.join("Languages", f"{self.language}.json")
-        try:
-            with open(lang_file, 'r', encoding='utf-8') as f:
-                self.lang = json.load(f)
-        except Exception as e:
-            print(f"Error loading language file: {e}")
-            self.lang = {
-                "app_title": "视频帧提取工具",
-                "menu_help": "帮助",
-                "menu_instructions": "使用说明",
-                "menu_precautions": "注意事项"
-            }
-            self.language = "zh-CN"
+        self.language, self.lang = load_language(self.language)
 
     def setup_style(self):
         style = ttk.Style()
@@ -134,8 +130,43 @@ class VideoFrameExtractor:
         self.end_frame_entry = ttk.Entry(frame_control, width=10, style="TEntry")
         self.end_frame_entry.pack(side=tk.LEFT, padx=8)
 
+        self.resume = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_control, text=self.lang["label_resume"], variable=self.resume).pack(side=tk.LEFT, padx=8)
+
+        output_control = ttk.Frame(main_frame)
+        output_control.grid(row=7, column=1, pady=5, sticky='w')
+
+        ttk.Label(output_control, text=self.lang["label_image_format"], style="TLabel").pack(side=tk.LEFT)
+        self.image_format = tk.StringVar(value=IMAGE_FORMATS[0])
+        ttk.Combobox(output_control, textvariable=self.image_format, values=IMAGE_FORMATS, width=6,
+                     state="readonly").pack(side=tk.LEFT, padx=8)
+
+        ttk.Label(output_control, text=self.lang["label_quality"], style="TLabel").pack(side=tk.LEFT)
+        self.quality_entry = ttk.Entry(output_control, width=5, style="TEntry")
+        self.quality_entry.insert(0, str(JPEG_QUALITY))
+        self.quality_entry.pack(side=tk.LEFT, padx=8)
+
+        ttk.Label(output_control, text=self.lang["label_png_compression"], style="TLabel").pack(side=tk.LEFT)
+        self.png_compression_entry = ttk.Entry(output_control, width=3, style="TEntry")
+        self.png_compression_entry.insert(0, str(PNG_COMPRESSION))
+        self.png_compression_entry.pack(side=tk.LEFT, padx=8)
+
+        self.image_format.trace_add("write", lambda *args: self.update_format_options())
+        self.update_format_options()
+
+        ttk.Label(output_control, text=self.lang["label_resize"], style="TLabel").pack(side=tk.LEFT)
+        self.resize_entry = ttk.Entry(output_control, width=10, style="TEntry")
+        self.resize_entry.pack(side=tk.LEFT, padx=8)
+
+        ttk.Label(output_control, text=self.lang["label_crop"], style="TLabel").pack(side=tk.LEFT)
+        self.crop_entry = ttk.Entry(output_control, width=16, style="TEntry")
+        self.crop_entry.pack(side=tk.LEFT, padx=8)
+
+        self.grayscale = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_control, text=self.lang["label_grayscale"], variable=self.grayscale).pack(side=tk.LEFT, padx=8)
+
         btn_frame = ttk.Frame(main_frame)
-        btn_frame.grid(row=7, column=1, pady=15)
+        btn_frame.grid(row=8, column=1, pady=15)
 
         self.process_btn = ttk.Button(btn_frame, text=self.lang["btn_process"], command=self.start_processing, width=14)
         self.process_btn.pack(side=tk.LEFT, padx=12)
@@ -145,13 +176,13 @@ class VideoFrameExtractor:
         self.extract_all_btn.pack_forget()
 
         self.progress = ttk.Progressbar(main_frame, orient='horizontal', length=650, mode='determinate')
-        self.progress.grid(row=8, column=0, columnspan=3, padx=10, pady=15)
+        self.progress.grid(row=9, column=0, columnspan=3, padx=10, pady=15)
 
         self.status_label = ttk.Label(main_frame, text=self.lang["status_ready"], anchor=tk.CENTER, style="Status.TLabel")
-        self.status_label.grid(row=9, column=0, columnspan=3, pady=(5, 0))
+        self.status_label.grid(row=10, column=0, columnspan=3, pady=(5, 0))
 
         bottom_frame = ttk.Frame(main_frame)
-        bottom_frame.grid(row=10, column=0, columnspan=3, pady=(15, 0), sticky='ew')
+        bottom_frame.grid(row=11, column=0, columnspan=3, pady=(15, 0), sticky='ew')
 
         ttk.Label(bottom_frame, text=self.lang["version_info"], style="Status.TLabel").pack(side=tk.RIGHT)
 
@@ -167,6 +198,7 @@ class VideoFrameExtractor:
         if messagebox.askyesno(self.lang["confirm_title"], self.lang["confirm_stop"]):
             self.stop_requested = True
             self.stop_processing = True
+            self.extractor.stop()
             self.status_label.config(text=self.lang["status_stopping"])
         else:
             self.stop_requested = False
@@ -223,23 +255,19 @@ class VideoFrameExtractor:
             self.create_log_file(dir_path)
 
     def create_log_file(self, output_dir):
-        log_path = os.path.join(output_dir, "extraction_log.txt")
         try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(
-                    f"\n\n=== {'新的提取任务' if self.language == 'zh-CN' else 'New Extraction Task'} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
-                f.write(f"{'视频文件' if self.language == 'zh-CN' else 'Video File'}: {self.video_path.get()}\n")
-        except Exception as e:
-            self.show_error(self.lang["log_create_error"].format(str(e)))
+            self.extractor.create_log_file(output_dir, self.video_path.get())
+        except ExtractionError as e:
+            self.show_error(str(e))
 
     def get_video_info(self):
         try:
-            cap = cv2.VideoCapture(self.video_path.get())
-            if not cap.isOpened():
-                messagebox.showerror(self.lang["error_title"], self.lang["video_open_error"])
+            try:
+                total = self.extractor.get_total_frames(self.video_path.get())
+            except ExtractionError as e:
+                messagebox.showerror(self.lang["error_title"], str(e))
                 return
 
-            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             self.total_frames = total
             self.total_frames_label.config(text=f"{'总帧数：' if self.language == 'zh-CN' else 'Total Frames: '}{total}")
 
@@ -247,8 +275,6 @@ class VideoFrameExtractor:
                 self.extract_all_btn.pack(side=tk.LEFT, padx=12)
             else:
                 self.extract_all_btn.pack_forget()
-
-            cap.release()
         except Exception as e:
             self.show_error(self.lang["video_info_error"].format(str(e)))
 
@@ -272,6 +298,24 @@ class VideoFrameExtractor:
             messagebox.showerror(self.lang["error_title"], self.lang["invalid_numbers"])
             return False
 
+    def update_format_options(self):
+        image_format = self.image_format.get()
+        self.quality_entry.config(state="normal" if image_format in ("jpg", "webp") else "disabled")
+        self.png_compression_entry.config(state="normal" if image_format == "png" else "disabled")
+
+    def get_output_settings(self):
+        image_format = self.image_format.get()
+        quality = self.quality_entry.get().strip() if image_format in ("jpg", "webp") else ""
+        png_compression = self.png_compression_entry.get().strip() if image_format == "png" else ""
+        return OutputSettings(
+            image_format,
+            quality=int(quality) if quality else None,
+            png_compression=int(png_compression) if png_compression else PNG_COMPRESSION,
+            resize=parse_size(self.resize_entry.get()),
+            crop=parse_crop(self.crop_entry.get()),
+            grayscale=self.grayscale.get()
+        )
+
     def start_processing(self):
         if self.processing:
             return
@@ -279,6 +323,13 @@ class VideoFrameExtractor:
         if not self.validate_inputs():
             return
 
+        try:
+            self.extractor.output_settings = self.get_output_settings()
+        except ValueError as e:
+            messagebox.showerror(self.lang["error_title"], self.lang["invalid_output_settings"].format(str(e)))
+            return
+        self.extractor.resume = self.resume.get()
+
         output_dir = self.output_dir.get()
         if not output_dir:
             messagebox.showerror(self.lang["error_title"], self.lang["no_output_dir"])
@@ -330,98 +381,20 @@ class VideoFrameExtractor:
 
     def update_progress(self, current, total):
         self.progress['value'] = (current / total) * 100
+        metrics = self.extractor.metrics
         self.status_label.config(
-            text=f"{'处理进度：' if self.language == 'zh-CN' else 'Processing: '}{current}/{total} {'帧' if self.language == 'zh-CN' else 'frames'} ({current / total:.1%})")
+            text=f"{'处理进度：' if self.language == 'zh-CN' else 'Processing: '}{current}/{total} {'帧' if self.language == 'zh-CN' else 'frames'} ({current / total:.1%})"
+                 f"  {metrics.fps:.1f} {'帧/秒' if self.language == 'zh-CN' else 'fps'}"
+                 f"  {'剩余' if self.language == 'zh-CN' else 'ETA'} {format_duration(metrics.eta)}")
         self.root.update_idletasks()
 
     def process_video(self, video_path, output_dir, start, end):
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                self.show_error(self.lang["video_open_error"])
-                return
-
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
-
-            actual_start = self.seek_to_frame(cap, start)
-            if actual_start != start:
-                self.show_error(
-                    f"{'无法定位到起始帧' if self.language == 'zh-CN' else 'Cannot seek to start frame'} {start}，{'实际定位到' if self.language == 'zh-CN' else 'actual position'} {actual_start}")
-                return
-
-            current_frame = actual_start
-            saved_count = 0
-            total_to_save = end - start + 1
-
-            ret, frame = cap.read()
-            if not ret:
-                self.show_error(self.lang["frame_read_error"].format(current_frame))
-                return
-
-            while current_frame <= end and not self.stop_processing:
-                if current_frame > actual_start:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-
-                if not self.save_frame(frame, current_frame, output_dir):
-                    break
-
-                saved_count += 1
-                if saved_count % 10 == 0:
-                    self.root.after(10, self.update_progress, saved_count, total_to_save)
-                current_frame += 1
-
-            cap.release()
-            self.root.after(10, self.finish_processing, saved_count)
-        except Exception as e:
-            self.show_error(self.lang["process_error"].format(str(e)))
-
-    def seek_to_frame(self, cap, target_frame):
-        try:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
-            actual_pos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-
-            while actual_pos < target_frame and cap.isOpened():
-                ret, _ = cap.read()
-                if not ret:
-                    break
-                actual_pos += 1
-
-            return actual_pos
-        except Exception as e:
-            self.show_error(self.lang["seek_error"].format(str(e)))
-            return target_frame
-
-    def save_frame(self, frame, frame_number, output_dir):
-        try:
-            if frame is None or frame.size == 0:
-                raise ValueError("无效的帧数据" if self.language == "zh-CN" else "Invalid frame data")
-
-            subfolder_num = (frame_number // 5000) + 1
-            subfolder = os.path.join(output_dir, f"subarea{subfolder_num}")
-            os.makedirs(subfolder, exist_ok=True)
-
-            filename = os.path.join(subfolder, f"frame_{frame_number:08d}.jpg")
-
-            if not cv2.imwrite(filename, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90]):
-                raise IOError("文件写入失败" if self.language == "zh-CN" else "File write failed")
-
-            self.write_log(output_dir, frame_number, filename)
-            return True
-
-        except Exception as e:
-            self.show_error(self.lang["frame_save_error"].format(frame_number, str(e)))
-            return False
-
-    def write_log(self, output_dir, frame_number, filename):
-        log_path = os.path.join(output_dir, "extraction_log.txt")
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(
-                    f"{datetime.now().strftime('%H:%M:%S')} - {'已保存帧' if self.language == 'zh-CN' else 'Saved frame'} {frame_number} {'到' if self.language == 'zh-CN' else 'to'} {filename}\n")
-        except Exception as e:
-            self.show_error(self.lang["log_write_error"].format(str(e)))
+            saved_count = self.extractor.process_video(video_path, output_dir, start, end)
+        except ExtractionError as e:
+            self.show_error(str(e))
+            return
+        self.root.after(10, self.finish_processing, saved_count)
 
     def show_error(self, message):
         self.root.after(10, messagebox.showerror, self.lang["error_title"], message)
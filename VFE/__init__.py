@@ -0,0 +1,8 @@
+from .archive import FrameArchive
+from .engine import ExtractionError, FrameExtractor
+from .filters import FrameFilter
+from .output import OutputSettings, OutputTarget
+from .sampling import Sampling
+
+__all__ = ["ExtractionError", "FrameArchive", "FrameExtractor", "FrameFilter", "OutputSettings", "OutputTarget",
+           "Sampling"]
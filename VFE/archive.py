@@ -0,0 +1,278 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from .output import decode_image
+
+ARCHIVE_FORMATS = ("shards", "npy")
+ARCHIVE_VERSION = 1
+ARCHIVE_META = "archive.json"
+ARCHIVE_INDEX = "archive_index.npy"
+SHARD_SIZE = 1 << 30
+RECORD_HEADER = struct.Struct("<QI")
+INDEX_DTYPE = np.dtype([("frame", "<i8"), ("file", "<i4"), ("offset", "<i8"), ("length", "<i8")])
+
+
+def part_name(filename, part=None):
+    if part is None:
+        return filename
+    base, extension = os.path.splitext(filename)
+    return f"{base}.part{part}{extension}"
+
+
+def load_archive_metadata(output_dir, part=None):
+    meta_path = os.path.join(output_dir, part_name(ARCHIVE_META, part))
+    if not os.path.exists(meta_path):
+        return None, np.empty(0, dtype=INDEX_DTYPE)
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    index_path = os.path.join(output_dir, part_name(ARCHIVE_INDEX, part))
+    index = np.load(index_path) if os.path.exists(index_path) else np.empty(0, dtype=INDEX_DTYPE)
+    return meta, index
+
+
+def save_archive_metadata(output_dir, meta, index, part=None):
+    index_path = os.path.join(output_dir, part_name(ARCHIVE_INDEX, part))
+    meta_path = os.path.join(output_dir, part_name(ARCHIVE_META, part))
+    with open(f"{index_path}.tmp", "wb") as f:
+        np.save(f, np.asarray(index, dtype=INDEX_DTYPE))
+    os.replace(f"{index_path}.tmp", index_path)
+    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def truncate_array(path, rows):
+    """Shrink a preallocated ``.npy`` file to its first ``rows`` rows in place.
+
+    The new shape never needs more header characters than the old one, so the header is rewritten
+    padded to its old length and the data offset stays the same.
+    """
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if shape[0] <= rows:
+            return
+        shape = (rows,) + tuple(shape[1:])
+        header = (f"{{'descr': {np.lib.format.dtype_to_descr(dtype)!r}, 'fortran_order': {fortran_order}, "
+                  f"'shape': {shape!r}, }}")
+        length_format = "<H" if version == (1, 0) else "<I"
+        header_length = offset - np.lib.format.MAGIC_LEN - struct.calcsize(length_format)
+        header = header.ljust(header_length - 1) + "\n"
+        f.seek(0)
+        f.write(np.lib.format.magic(*version))
+        f.write(struct.pack(length_format, header_length))
+        f.write(header.encode("utf8" if version == (3, 0) else "latin1"))
+        f.truncate(offset + rows * dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64)))
+
+
+def repair_arrays(output_dir, files, index):
+    # An interrupted job leaves its last array at the preallocated size; drop the rows never written.
+    for file_id, name in enumerate(files):
+        path = os.path.join(output_dir, name)
+        if name.endswith(".npy") and os.path.exists(path):
+            slots = index["offset"][index["file"] == file_id]
+            truncate_array(path, int(slots.max()) + 1 if len(slots) else 0)
+
+
+def merge_archive_parts(output_dir, parts):
+    meta, index = load_archive_metadata(output_dir)
+    files = list(meta["files"]) if meta else []
+    indexes = [index]
+    for part in parts:
+        part_meta, part_index = load_archive_metadata(output_dir, part)
+        if part_meta is None:
+            continue
+        if meta is None:
+            meta = dict(part_meta)
+        part_index = part_index.copy()
+        part_index["file"] += len(files)
+        files.extend(part_meta["files"])
+        indexes.append(part_index)
+        for name in (ARCHIVE_META, ARCHIVE_INDEX):
+            os.remove(os.path.join(output_dir, part_name(name, part)))
+    if meta is None:
+        return
+    meta["files"] = files
+    save_archive_metadata(output_dir, meta, np.concatenate(indexes))
+
+
+class ArchiveWriter:
+    def __init__(self, output_dir, archive_format="shards", extension="jpg", shard_size=SHARD_SIZE,
+                 capacity=None, part=None):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+        self.output_dir = output_dir
+        self.format = archive_format
+        self.extension = extension
+        self.shard_size = shard_size
+        self.capacity = capacity
+        self.part = part
+
+        base_meta, base_index = load_archive_metadata(output_dir)
+        if base_meta is not None and base_meta["format"] != archive_format:
+            raise ValueError(f"Output directory already holds a {base_meta['format']} archive")
+        self.file_number = len(base_meta["files"]) if base_meta else 0
+        self.base_meta = base_meta if part is None else None
+        self.files = list(base_meta["files"]) if self.base_meta else []
+        self.entries = [tuple(entry) for entry in base_index.tolist()] if self.base_meta else []
+        if self.base_meta and archive_format == "npy":
+            repair_arrays(output_dir, self.files, base_index)
+        self.current = None
+        self.current_size = 0
+        self.slot = 0
+
+    def new_file_name(self, extension):
+        while True:
+            self.file_number += 1
+            suffix = "" if self.part is None else f"_p{self.part}"
+            name = f"frames_{self.file_number:05d}{suffix}.{extension}"
+            if not os.path.exists(os.path.join(self.output_dir, name)):
+                return name
+
+    def open_shard(self):
+        self.close_current()
+        name = self.new_file_name("vfa")
+        self.files.append(name)
+        self.current = open(os.path.join(self.output_dir, name), "wb")
+        self.current_size = 0
+
+    def open_array(self, frame):
+        self.close_current()
+        name = self.new_file_name("npy")
+        self.files.append(name)
+        # Arrays roll over at shard_size like shards do; close() trims the last one to the rows written.
+        rows = max(1, self.shard_size // max(1, frame.nbytes))
+        if self.capacity:
+            rows = min(rows, self.capacity)
+        self.current = np.lib.format.open_memmap(
+            os.path.join(self.output_dir, name), mode="w+", dtype=frame.dtype, shape=(rows,) + frame.shape)
+        self.slot = 0
+
+    def append(self, frame_number, data):
+        if self.format == "npy":
+            if (self.current is None or self.slot >= len(self.current)
+                    or self.current.shape[1:] != data.shape):
+                self.open_array(data)
+            self.current[self.slot] = data
+            self.entries.append((frame_number, len(self.files) - 1, self.slot, 0))
+            self.slot += 1
+            return f"{self.files[-1]}[{self.slot - 1}]"
+
+        data = memoryview(data).cast("B")
+        if self.current is None or (self.current_size and self.current_size + len(data) > self.shard_size):
+            self.open_shard()
+        offset = self.current_size + RECORD_HEADER.size
+        self.current.write(RECORD_HEADER.pack(frame_number, len(data)))
+        self.current.write(data)
+        self.current_size = offset + len(data)
+        self.entries.append((frame_number, len(self.files) - 1, offset, len(data)))
+        return f"{self.files[-1]}@{offset}"
+
+    def close_current(self):
+        if self.current is None:
+            return
+        if self.format == "npy":
+            self.current.flush()
+            rows = len(self.current)
+            self.current = None
+            if self.slot < rows:
+                truncate_array(os.path.join(self.output_dir, self.files[-1]), self.slot)
+            return
+        self.current.close()
+        self.current = None
+
+    def checkpoint(self):
+        if self.current is not None:
+            self.current.flush()
+        self.save_metadata()
+
+    def close(self):
+        self.close_current()
+        self.save_metadata()
+
+    def save_metadata(self):
+        if not self.files:
+            return
+        meta = {"version": ARCHIVE_VERSION, "format": self.format, "extension": self.extension, "files": self.files}
+        save_archive_metadata(self.output_dir, meta, np.array(self.entries, dtype=INDEX_DTYPE), self.part)
+
+
+class FrameArchive:
+    def __init__(self, output_dir):
+        meta, index = load_archive_metadata(output_dir)
+        if meta is None:
+            raise FileNotFoundError(f"No frame archive in {output_dir}")
+        self.output_dir = output_dir
+        self.format = meta["format"]
+        self.extension = meta.get("extension", "jpg")
+        self.files = meta["files"]
+        order = np.argsort(index["frame"], kind="stable")
+        index = index[order]
+        last = np.ones(len(index), dtype=bool)
+        last[:-1] = index["frame"][1:] != index["frame"][:-1]
+        self.index = index[last]
+        self.arrays = {}
+        self.handles = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, frame_number):
+        return self.position(frame_number) is not None
+
+    def __iter__(self):
+        for frame_number in self.frame_numbers():
+            yield frame_number, self.read(frame_number)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def frame_numbers(self):
+        return self.index["frame"].tolist()
+
+    def position(self, frame_number):
+        position = int(np.searchsorted(self.index["frame"], frame_number))
+        if position < len(self.index) and self.index["frame"][position] == frame_number:
+            return position
+        return None
+
+    def entry(self, frame_number):
+        position = self.position(frame_number)
+        if position is None:
+            raise KeyError(frame_number)
+        return self.index[position]
+
+    def read_bytes(self, frame_number):
+        entry = self.entry(frame_number)
+        if self.format == "npy":
+            return self.read(frame_number).tobytes()
+        file_id = int(entry["file"])
+        handle = self.handles.get(file_id)
+        if handle is None:
+            handle = self.handles[file_id] = open(os.path.join(self.output_dir, self.files[file_id]), "rb")
+        handle.seek(int(entry["offset"]))
+        return handle.read(int(entry["length"]))
+
+    def read(self, frame_number):
+        entry = self.entry(frame_number)
+        if self.format == "npy":
+            file_id = int(entry["file"])
+            array = self.arrays.get(file_id)
+            if array is None:
+                array = self.arrays[file_id] = np.load(os.path.join(self.output_dir, self.files[file_id]), mmap_mode="r")
+            return array[int(entry["offset"])]
+        return decode_image(self.read_bytes(frame_number), self.extension)
+
+    def close(self):
+        for handle in self.handles.values():
+            handle.close()
+        self.handles.clear()
+        self.arrays.clear()
@@ -0,0 +1,249 @@
+import copy
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .engine import ExtractionError, FrameExtractor
+from .i18n import load_language
+from .metrics import peak_rss_mb
+from .probe import PROBE_WORKERS, get_probe_cache, probe_many
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".flv", ".wmv")
+SUMMARY_FILENAME = "batch_summary.json"
+
+
+def is_video_file(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+class BatchJob:
+    def __init__(self, video_path, output_dir, start=0, end=None):
+        self.video_path = video_path
+        self.output_dir = output_dir
+        self.start = start
+        self.end = end
+        self.status = "pending"
+        self.saved_count = 0
+        self.dropped_count = 0
+        self.error = None
+        self.elapsed = 0.0
+        self.fps = 0.0
+
+    def as_dict(self):
+        return {
+            "video": self.video_path,
+            "output": self.output_dir,
+            "start": self.start,
+            "end": self.end,
+            "status": self.status,
+            "saved_frames": self.saved_count,
+            "dropped_frames": self.dropped_count,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 3),
+            "fps": round(self.fps, 2),
+        }
+
+
+def read_manifest(manifest_path):
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if line.startswith("{") else {"video": line}
+            entry["video"] = os.path.join(base_dir, entry["video"])
+            if entry.get("output"):
+                entry["output"] = os.path.join(base_dir, entry["output"])
+            entries.append(entry)
+    return entries
+
+
+def find_videos(source, recursive=False):
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+        return source, sorted(p for p in glob.glob(pattern, recursive=recursive) if is_video_file(p) and os.path.isfile(p))
+    if os.path.isfile(source):
+        return os.path.dirname(os.path.abspath(source)), [source]
+    videos = sorted(p for p in glob.glob(source, recursive=True) if is_video_file(p) and os.path.isfile(p))
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in videos]) if videos else ""
+    return base_dir, videos
+
+
+def job_output_dir(output_root, base_dir, video_path, keep_extension=False):
+    relative = os.path.relpath(os.path.abspath(video_path), os.path.abspath(base_dir)) if base_dir else os.path.basename(video_path)
+    stem, extension = os.path.splitext(relative)
+    if keep_extension:
+        stem = f"{stem}_{extension.lstrip('.')}"
+    return os.path.join(output_root, stem)
+
+
+def group_by_output(jobs):
+    outputs = {}
+    for job in jobs:
+        outputs.setdefault(os.path.abspath(job.output_dir), []).append(job)
+    return outputs
+
+
+def assign_output_dirs(jobs, output_root, base_dir):
+    automatic = [job for job in jobs if job.output_dir is None]
+    for job in automatic:
+        job.output_dir = job_output_dir(output_root, base_dir, job.video_path)
+    for same_output in group_by_output(automatic).values():
+        if len(same_output) > 1:
+            for job in same_output:
+                job.output_dir = job_output_dir(output_root, base_dir, job.video_path, True)
+    # The same video listed with several ranges gets one directory per range.
+    for same_output in group_by_output(automatic).values():
+        if len(same_output) > 1:
+            for job in same_output:
+                job.output_dir = f"{job.output_dir}_{job.start}-{'end' if job.end is None else job.end}"
+
+    # Jobs sharing a directory would overwrite each other's manifest, log and metrics.
+    for output_dir, same_output in group_by_output(jobs).items():
+        if len(same_output) > 1:
+            raise ExtractionError(f"Several batch entries write to {output_dir}: "
+                                  + ", ".join(job.video_path for job in same_output))
+    return jobs
+
+
+def probe_directory(source, recursive=False, exact=False, workers=PROBE_WORKERS, cache=None, index_dir=None):
+    _, videos = find_videos(source, recursive)
+    return probe_many(videos, exact, workers, cache, index_dir)
+
+
+def collect_jobs(source, output_root, start=0, end=None, recursive=False):
+    if os.path.isfile(source) and not is_video_file(source):
+        entries = read_manifest(source)
+        base_dir = os.path.commonpath([os.path.dirname(e["video"]) for e in entries]) if entries else ""
+        jobs = [
+            BatchJob(entry["video"], entry.get("output"), entry.get("start", start), entry.get("end", end))
+            for entry in entries
+        ]
+    else:
+        base_dir, videos = find_videos(source, recursive)
+        jobs = [BatchJob(video, None, start, end) for video in videos]
+    return assign_output_dirs(jobs, output_root, base_dir)
+
+
+class BatchRunner:
+    def __init__(self, concurrency=2, threads=None, on_job_update=None, **extractor_options):
+        self.concurrency = max(1, concurrency)
+        self.threads = threads or os.cpu_count() or 1
+        self.on_job_update = on_job_update
+        if extractor_options.get("lang") is None:
+            extractor_options["language"], extractor_options["lang"] = load_language(extractor_options.get("language"))
+        self.extractor_options = extractor_options
+        self.extractors = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    @property
+    def threads_per_job(self):
+        return max(1, self.threads // self.concurrency)
+
+    @property
+    def decoder_threads_per_job(self):
+        # Left at the backend default, every concurrent job's decoder would use all cores.
+        return self.extractor_options.get("decoder_threads") or max(1, self.threads_per_job // 2)
+
+    @property
+    def workers_per_job(self):
+        return max(1, self.threads_per_job - self.decoder_threads_per_job)
+
+    def job_options(self):
+        options = dict(self.extractor_options)
+        options["decoder_threads"] = self.decoder_threads_per_job
+        if options.get("memory_budget_mb"):
+            options["memory_budget_mb"] = options["memory_budget_mb"] / self.concurrency
+        return options
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            for extractor in self.extractors:
+                extractor.stop()
+
+    def save_metrics(self):
+        with self.lock:
+            extractors = list(self.extractors)
+        for extractor in extractors:
+            extractor.save_metrics()
+
+    def update(self, job):
+        if self.on_job_update is not None:
+            with self.lock:
+                self.on_job_update(job)
+
+    def run_job(self, job, sampling, frame_filter):
+        if self.stop_event.is_set():
+            job.status = "stopped"
+            return job
+
+        extractor = FrameExtractor(workers=self.workers_per_job, **self.job_options())
+        with self.lock:
+            self.extractors.add(extractor)
+        job.status = "running"
+        self.update(job)
+        started = time.monotonic()
+        try:
+            end = job.end
+            if end is not None:
+                end = min(end, extractor.get_total_frames(job.video_path) - 1)
+            job.saved_count = extractor.run_job(job.video_path, job.output_dir, job.start, end, sampling,
+                                                copy.deepcopy(frame_filter))
+            job.dropped_count = extractor.dropped_count
+            job.fps = extractor.metrics.fps
+            job.status = "stopped" if extractor.stopped else "done"
+        except ExtractionError as e:
+            job.status = "failed"
+            job.error = str(e)
+        except Exception as e:
+            job.status = "failed"
+            job.error = extractor.text("process_error", str(e))
+        finally:
+            job.elapsed = time.monotonic() - started
+            with self.lock:
+                self.extractors.discard(extractor)
+        self.update(job)
+        return job
+
+    def probe_jobs(self, jobs):
+        # One concurrent pass and a single cache write up front, instead of a probe per job as it starts.
+        probe_many([job.video_path for job in jobs], workers=PROBE_WORKERS,
+                   cache=get_probe_cache(self.extractor_options.get("probe_cache")),
+                   index_dir=self.extractor_options.get("index_dir"))
+
+    def run(self, jobs, output_root=None, sampling=None, frame_filter=None):
+        self.stop_event.clear()
+        started = time.monotonic()
+        self.probe_jobs(jobs)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="VFE-batch") as executor:
+            futures = [executor.submit(self.run_job, job, sampling, frame_filter) for job in jobs]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                self.stop()
+                raise
+
+        summary = {
+            "total": len(jobs),
+            "done": sum(1 for job in jobs if job.status == "done"),
+            "failed": sum(1 for job in jobs if job.status == "failed"),
+            "stopped": sum(1 for job in jobs if job.status in ("stopped", "pending")),
+            "saved_frames": sum(job.saved_count for job in jobs),
+            "dropped_frames": sum(job.dropped_count for job in jobs),
+            "elapsed": round(time.monotonic() - started, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "jobs": [job.as_dict() for job in jobs],
+        }
+        if output_root:
+            os.makedirs(output_root, exist_ok=True)
+            with open(os.path.join(output_root, SUMMARY_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
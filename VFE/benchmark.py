@@ -0,0 +1,292 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from .engine import FrameExtractor
+from .i18n import load_language
+from .output import OutputSettings
+from .sampling import Sampling
+from .seekindex import load_or_build_index
+
+BENCHMARK_VERSION = 2
+BENCHMARK_FILENAME = "benchmark.json"
+DEFAULT_WORK_DIR = os.path.join(tempfile.gettempdir(), "VFE-benchmark")
+DEFAULT_RESOLUTIONS = ((640, 360), (1280, 720), (1920, 1080))
+DEFAULT_CODECS = ("mp4v", "MJPG")
+DEFAULT_LENGTHS = (300,)
+DEFAULT_GOPS = (12, 250)
+DEFAULT_FPS = 25
+CODEC_EXTENSIONS = {"mp4v": "mp4", "avc1": "mp4", "XVID": "avi", "MJPG": "avi", "FFV1": "avi", "VP80": "webm"}
+SPARSE_STRIDE = 25
+DEEP_SEEKS = 20
+DEFAULT_REPEAT = 5
+MIN_SAMPLE_SECONDS = 0.5
+REGRESSION_TOLERANCE = 0.15
+
+SCENARIOS = {
+    "full": {},
+    "full_pipelined": {"workers": 0},
+    "sparse": {"sampling": Sampling.every(SPARSE_STRIDE)},
+    "sparse_indexed": {"sampling": Sampling.every(SPARSE_STRIDE), "use_seek_index": True},
+    "png": {"output_settings": OutputSettings("png")},
+    "webp": {"output_settings": OutputSettings("webp")},
+    "half_size": {"output_settings": OutputSettings(resize=0.5)},
+    "shards": {"output_format": "shards"},
+    "raw_npy": {"output_settings": OutputSettings("raw"), "output_format": "npy"},
+    "deep_seek": {"seek": True},
+    "deep_seek_indexed": {"seek": True, "use_seek_index": True},
+}
+
+
+class VideoSpec:
+    def __init__(self, width, height, codec="mp4v", frames=300, gop=12, fps=DEFAULT_FPS):
+        if codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.width = width
+        self.height = height
+        self.codec = codec
+        self.frames = frames
+        self.gop = gop
+        self.fps = fps
+
+    @property
+    def name(self):
+        return f"{self.width}x{self.height}_{self.codec}_{self.frames}f_gop{self.gop}"
+
+    @property
+    def filename(self):
+        return f"{self.name}.{CODEC_EXTENSIONS[self.codec]}"
+
+    def as_dict(self):
+        return {"name": self.name, "width": self.width, "height": self.height, "codec": self.codec,
+                "frames": self.frames, "gop": self.gop, "fps": self.fps}
+
+
+def video_specs(resolutions=DEFAULT_RESOLUTIONS, codecs=DEFAULT_CODECS, lengths=DEFAULT_LENGTHS, gops=DEFAULT_GOPS):
+    specs = []
+    for width, height in resolutions:
+        for codec in codecs:
+            for frames in lengths:
+                # Intra-only codecs ignore the GOP size, one video per length is enough.
+                for gop in (gops[:1] if codec in ("MJPG", "FFV1") else gops):
+                    specs.append(VideoSpec(width, height, codec, frames, gop))
+    return specs
+
+
+def synthetic_frames(spec, seed=0):
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(0, 256, (spec.height // 8 + 1, (spec.width + spec.frames) // 8 + 1, 3), dtype=np.uint8)
+    texture = cv2.resize(texture, (texture.shape[1] * 8, texture.shape[0] * 8), interpolation=cv2.INTER_LINEAR)
+    for frame_number in range(spec.frames):
+        frame = np.ascontiguousarray(texture[:spec.height, frame_number:frame_number + spec.width])
+        cv2.putText(frame, f"{frame_number:06d}", (spec.width // 20, spec.height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    spec.height / 240, (255, 255, 255), max(1, spec.height // 120))
+        yield frame
+
+
+def open_writer(path, spec):
+    fourcc = cv2.VideoWriter_fourcc(*spec.codec)
+    key_interval = getattr(cv2, "VIDEOWRITER_PROP_KEY_INTERVAL", None)
+    if key_interval is not None:
+        writer = cv2.VideoWriter(path, cv2.CAP_FFMPEG, fourcc, spec.fps, (spec.width, spec.height),
+                                 [key_interval, spec.gop])
+        if writer.isOpened():
+            return writer
+    return cv2.VideoWriter(path, fourcc, spec.fps, (spec.width, spec.height))
+
+
+def generate_video(spec, video_dir):
+    path = os.path.join(video_dir, spec.filename)
+    if os.path.exists(path):
+        return path
+    os.makedirs(video_dir, exist_ok=True)
+    tmp_path = os.path.join(video_dir, f"tmp_{spec.filename}")
+    writer = open_writer(tmp_path, spec)
+    try:
+        if not writer.isOpened():
+            raise IOError(f"Codec {spec.codec} is not available for writing")
+        for frame in synthetic_frames(spec):
+            writer.write(frame)
+    finally:
+        writer.release()
+    os.replace(tmp_path, path)
+    return path
+
+
+def environment_info():
+    return {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+class Benchmark:
+    def __init__(self, work_dir=None, scenarios=None, repeat=DEFAULT_REPEAT, language=None, on_result=None):
+        unknown = set(scenarios or ()) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f"Unknown benchmark scenarios: {', '.join(sorted(unknown))}")
+        self.work_dir = work_dir or DEFAULT_WORK_DIR
+        self.video_dir = os.path.join(self.work_dir, "videos")
+        self.index_dir = os.path.join(self.work_dir, "index")
+        self.probe_cache = os.path.join(self.work_dir, "probe.json")
+        self.scenarios = list(scenarios or SCENARIOS)
+        self.repeat = max(1, repeat)
+        self.language, self.lang = load_language(language)
+        self.on_result = on_result
+
+    def extractor(self, **options):
+        return FrameExtractor(language=self.language, lang=self.lang, index_dir=self.index_dir,
+                              probe_cache=self.probe_cache, **options)
+
+    def prepare(self, spec):
+        path = generate_video(spec, self.video_dir)
+        index = load_or_build_index(path, self.index_dir)
+        video = spec.as_dict()
+        video["path"] = path
+        video["size"] = os.path.getsize(path)
+        video["decoded_frames"] = index.frame_count
+        video["keyframes"] = len(index.keyframes)
+        video["mean_keyframe_interval"] = round(index.frame_count / len(index.keyframes), 2)
+        return video
+
+    def time_extraction(self, path, frame_count, sampling=None, **options):
+        # Short clips are extracted again until the sample spans MIN_SAMPLE_SECONDS, so timer and
+        # scheduler noise stay small against the measured time.
+        saved = 0
+        elapsed = 0.0
+        while elapsed < MIN_SAMPLE_SECONDS:
+            extractor = self.extractor(**options)
+            output_dir = tempfile.mkdtemp(prefix="run_", dir=self.work_dir)
+            try:
+                started = time.perf_counter()
+                saved += extractor.run_job(path, output_dir, 0, frame_count - 1, sampling)
+                elapsed += time.perf_counter() - started
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+        return saved, elapsed
+
+    def time_seeks(self, path, frame_count, use_seek_index=False):
+        extractor = self.extractor(use_seek_index=use_seek_index)
+        index = extractor.get_seek_index(path) if use_seek_index else None
+        targets = [frame_count // 2 + (frame_count // 2 - 1) * (i + 1) // DEEP_SEEKS for i in range(DEEP_SEEKS)]
+        count = 0
+        accurate = 0
+        elapsed = 0.0
+        while elapsed < MIN_SAMPLE_SECONDS:
+            for target in targets:
+                cap = cv2.VideoCapture(path)
+                try:
+                    started = time.perf_counter()
+                    position = extractor.seek_to_frame(cap, target, index)
+                    ret = cap.grab()
+                    elapsed += time.perf_counter() - started
+                    accurate += position == target and ret
+                    count += 1
+                finally:
+                    cap.release()
+        return count, elapsed, accurate == count
+
+    def run_scenario(self, video, name):
+        """Time one scenario ``repeat`` times after an untimed warm-up; report the median and best rates."""
+        options = dict(SCENARIOS[name])
+        seek = options.pop("seek", False)
+        frame_count = video["decoded_frames"]
+        samples = []
+        for _ in range(self.repeat + 1):
+            if seek:
+                count, seconds, accurate = self.time_seeks(video["path"], frame_count, **options)
+                sample = {"unit": "seeks", "count": count, "seconds": seconds, "accurate": accurate}
+            else:
+                count, seconds = self.time_extraction(video["path"], frame_count, **options)
+                sample = {"unit": "frames", "count": count, "seconds": seconds}
+            sample["rate"] = count / seconds if seconds > 0 else 0.0
+            samples.append(sample)
+        samples = samples[1:]
+        rates = [sample["rate"] for sample in samples]
+        median = statistics.median(rates)
+        result = min(samples, key=lambda sample: abs(sample["rate"] - median))
+        result.update(
+            video=video["name"],
+            scenario=name,
+            seconds=round(result["seconds"], 4),
+            rate=round(median, 2),
+            best_rate=round(max(rates), 2),
+            worst_rate=round(min(rates), 2),
+            spread=round((max(rates) - min(rates)) / median, 4) if median else None,
+        )
+        if seek:
+            result["accurate"] = all(sample["accurate"] for sample in samples)
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
+
+    def run(self, specs):
+        os.makedirs(self.work_dir, exist_ok=True)
+        started = time.monotonic()
+        videos = []
+        results = []
+        for spec in specs:
+            video = self.prepare(spec)
+            videos.append(video)
+            for name in self.scenarios:
+                results.append(self.run_scenario(video, name))
+        return {
+            "version": BENCHMARK_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "command": " ".join(sys.argv),
+            "environment": environment_info(),
+            "repeat": self.repeat,
+            "elapsed": round(time.monotonic() - started, 3),
+            "videos": [{key: value for key, value in video.items() if key != "path"} for video in videos],
+            "results": results,
+        }
+
+
+def save_report(report, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    previous = {(result["video"], result["scenario"]): result for result in baseline.get("results", [])}
+    comparisons = []
+    for result in current.get("results", []):
+        before = previous.get((result["video"], result["scenario"]))
+        # Background load only ever slows a run down, so the fastest repeat is the steadiest figure to
+        # compare, and a slowdown still within the baseline's own range of repeats is noise. Version 1
+        # reports only carry the single measured rate.
+        before_rate = before.get("best_rate", before.get("rate")) if before else None
+        rate = result.get("best_rate", result.get("rate"))
+        if not before_rate or not rate:
+            continue
+        change = rate / before_rate - 1
+        slower = change < -tolerance and rate < before.get("worst_rate", before_rate)
+        comparisons.append({
+            "video": result["video"],
+            "scenario": result["scenario"],
+            "baseline_rate": before_rate,
+            "rate": rate,
+            "change": round(change, 4),
+            "regression": slower or (before.get("accurate", True) and not result.get("accurate", True)),
+        })
+    return comparisons
@@ -0,0 +1,76 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+def frame_shape(cap):
+    return int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3
+
+
+class FrameRing:
+    """Buffers handed out in rotation; a buffer is reused ``len(ring)`` frames after it was given out."""
+
+    def __init__(self, shape, count, dtype=np.uint8):
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(max(1, count))]
+        self.slot = 0
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def acquire(self):
+        buffer = self.buffers[self.slot]
+        self.slot = (self.slot + 1) % len(self.buffers)
+        return buffer
+
+    def replace(self, buffer, frame):
+        for position, current in enumerate(self.buffers):
+            if current is buffer:
+                self.buffers[position] = frame
+                return
+
+    def release(self, frame):
+        pass
+
+
+class FramePool:
+    """A fixed set of preallocated frame buffers; ``acquire`` blocks until one is released."""
+
+    def __init__(self, shape, count, dtype=np.uint8):
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(max(1, count))]
+        self.owned = {id(buffer) for buffer in self.buffers}
+        self.free = list(self.buffers)
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.buffers)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers)
+
+    @property
+    def available(self):
+        return len(self.free)
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.free, timeout):
+                raise TimeoutError("No free frame buffer")
+            return self.free.pop()
+
+    def replace(self, buffer, frame):
+        # The decoder allocated a new array because the stream size differs from the buffer; keep that one instead.
+        with self.condition:
+            for position, current in enumerate(self.buffers):
+                if current is buffer:
+                    self.buffers[position] = frame
+                    self.owned.discard(id(buffer))
+                    self.owned.add(id(frame))
+                    return
+
+    def release(self, frame):
+        with self.condition:
+            if id(frame) in self.owned and not any(buffer is frame for buffer in self.free):
+                self.free.append(frame)
+                self.condition.notify()
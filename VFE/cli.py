@@ -0,0 +1,442 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from .archive import ARCHIVE_FORMATS, SHARD_SIZE
+from .batch import BatchRunner, collect_jobs, probe_directory
+from .benchmark import (BENCHMARK_FILENAME, DEFAULT_CODECS, DEFAULT_GOPS, DEFAULT_LENGTHS, DEFAULT_REPEAT,
+                        DEFAULT_RESOLUTIONS, REGRESSION_TOLERANCE, SCENARIOS, Benchmark, compare_reports, load_report,
+                        save_report, video_specs)
+from .decoder import DECODER_BACKENDS, DEFAULT_TUNE_CACHE, autotune, tune_key
+from .engine import ExtractionError, FrameExtractor
+from .filters import FILTER_METRICS, FILTER_MODES, FrameFilter
+from .framelog import FLUSH_INTERVAL, FLUSH_LINES, LOG_FORMATS
+from .metrics import METRICS_FILENAME, format_duration
+from .output import (IMAGE_FORMATS, JPEG_QUALITY, PNG_COMPRESSION, OutputSettings, parse_crop, parse_size,
+                     parse_target)
+from .probe import DEFAULT_PROBE_CACHE, PROBE_WORKERS, get_probe_cache, probe_many
+from .sampling import Sampling, parse_number_list
+from .watch import POLL_INTERVAL, SETTLE_SECONDS, FolderWatcher
+
+
+def print_progress(current, total, dropped=None, metrics=None):
+    dropped_text = f", dropped {dropped}" if dropped else ""
+    rate_text = f", {metrics.fps:.1f} fps, ETA {format_duration(metrics.eta)}" if metrics is not None else ""
+    sys.stderr.write(f"\rProcessing: {current}/{total} frames ({current / total:.1%}){dropped_text}{rate_text}  ")
+    sys.stderr.flush()
+
+
+def handle_metrics_signal(job):
+    # On POSIX, `kill -USR1 <pid>` writes the current metrics of the running job(s) without stopping them.
+    if not hasattr(signal, "SIGUSR1"):
+        return
+    requested = threading.Event()
+
+    def save_metrics():
+        # The handler runs on the main thread, which may be holding the metrics lock mid-frame,
+        # so it only wakes this thread and the file is written from here.
+        while True:
+            requested.wait()
+            requested.clear()
+            try:
+                job.save_metrics()
+                sys.stderr.write(f"\nMetrics written to {METRICS_FILENAME}\n")
+            except ExtractionError as e:
+                sys.stderr.write(f"\n{e}\n")
+
+    threading.Thread(target=save_metrics, name="VFE-metrics", daemon=True).start()
+    signal.signal(signal.SIGUSR1, lambda signum, frame: requested.set())
+
+
+def sampling_from_args(args):
+    if args.every:
+        return Sampling.every(args.every)
+    if args.fps:
+        return Sampling.per_second(args.fps)
+    if args.frames:
+        return Sampling.frames(parse_number_list(args.frames))
+    if args.times:
+        return Sampling.times(parse_number_list(args.times, float))
+    return Sampling()
+
+
+def output_settings_from_args(args):
+    return OutputSettings(
+        args.image_format,
+        quality=args.quality,
+        png_compression=args.png_compression,
+        resize=parse_size(args.resize) if args.resize else None,
+        crop=parse_crop(args.crop) if args.crop else None,
+        grayscale=args.grayscale
+    )
+
+
+def job_settings_from_args(args):
+    try:
+        sampling = sampling_from_args(args)
+        frame_filter = FrameFilter(args.filter, args.filter_metric, args.filter_threshold) if args.filter else None
+        args.output_settings = output_settings_from_args(args)
+        args.targets = [parse_target(text, args.output_settings, args.output_format) for text in args.target]
+    except ValueError as e:
+        raise ExtractionError(str(e)) from e
+    return sampling, frame_filter
+
+
+def extractor_options_from_args(args):
+    return {
+        "language": args.language,
+        "queue_size": args.queue_size,
+        "log_format": args.log_format,
+        "log_flush_lines": args.log_flush_lines,
+        "log_flush_interval": args.log_flush_interval,
+        "use_seek_index": args.seek_index,
+        "index_dir": args.index_dir,
+        "probe_cache": args.probe_cache,
+        "memory_budget_mb": args.memory_budget,
+        "decoder_backend": args.decoder,
+        "decoder_threads": args.decoder_threads,
+        "autotune_decoder": args.autotune_decoder,
+        "decoder_cache": args.decoder_cache,
+        "output_format": args.output_format,
+        "shard_size": args.shard_size_mb << 20,
+        "resume": args.resume,
+        "output_settings": args.output_settings,
+        "targets": args.targets,
+    }
+
+
+def run_extract(args):
+    sampling, frame_filter = job_settings_from_args(args)
+
+    extractor = FrameExtractor(
+        on_progress=None if args.quiet else (
+            lambda current, total: print_progress(current, total, extractor.dropped_count, extractor.metrics)),
+        workers=args.workers,
+        processes=args.processes,
+        **extractor_options_from_args(args)
+    )
+    handle_metrics_signal(extractor)
+
+    try:
+        saved_count = extractor.run_job(args.video, args.output, args.start, args.end, sampling, frame_filter)
+    except KeyboardInterrupt:
+        extractor.stop()
+        raise
+    finally:
+        if not args.quiet:
+            sys.stderr.write("\n")
+
+    print(extractor.text("status_complete", saved_count))
+    if frame_filter is not None:
+        print(f"Dropped {extractor.dropped_count} near-duplicate frames")
+    print(f"{extractor.metrics.fps:.1f} fps in {extractor.metrics.elapsed:.1f}s, stage timings in {METRICS_FILENAME}")
+    return 0
+
+
+def print_job_update(job):
+    if job.status == "running":
+        return
+    detail = job.error if job.status == "failed" else f"{job.saved_count} frames, {job.elapsed:.1f}s"
+    print(f"[{job.status}] {job.video_path} -> {job.output_dir}: {detail}")
+
+
+def run_batch(args):
+    sampling, frame_filter = job_settings_from_args(args)
+    jobs = collect_jobs(args.source, args.output, args.start, args.end, recursive=args.recursive)
+    if not jobs:
+        raise ExtractionError(f"No videos found in {args.source}")
+
+    runner = BatchRunner(
+        concurrency=args.jobs,
+        threads=args.threads,
+        on_job_update=None if args.quiet else print_job_update,
+        **extractor_options_from_args(args)
+    )
+    handle_metrics_signal(runner)
+    try:
+        summary = runner.run(jobs, args.output, sampling, frame_filter)
+    except KeyboardInterrupt:
+        runner.stop()
+        raise
+
+    print(f"Batch finished: {summary['done']} done, {summary['failed']} failed, {summary['stopped']} stopped, "
+          f"{summary['saved_frames']} frames in {summary['elapsed']:.1f}s")
+    return 0 if summary["failed"] == 0 else 2
+
+
+def run_watch(args):
+    if not os.path.isdir(args.source):
+        raise ExtractionError(f"Not a directory: {args.source}")
+    sampling, frame_filter = job_settings_from_args(args)
+    # Watched files are extracted once per version, so an interrupted job always continues where it stopped.
+    runner = BatchRunner(concurrency=args.jobs, threads=args.threads, **{**extractor_options_from_args(args), "resume": True})
+    watcher = FolderWatcher(args.source, args.output, args.start, args.end, sampling, frame_filter,
+                            recursive=args.recursive, poll_interval=args.interval, settle_seconds=args.settle,
+                            state_path=args.state, runner=runner,
+                            on_job_update=None if args.quiet else print_job_update)
+    handle_metrics_signal(runner)
+    if not args.quiet:
+        print(f"Watching {args.source} (every {args.interval:g}s, ready after {args.settle:g}s without changes)")
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        watcher.stop()
+        raise
+    return 0
+
+
+def run_index(args):
+    extractor = FrameExtractor(language=args.language, use_seek_index=True, index_dir=args.index_dir)
+    for video in args.videos:
+        index = extractor.get_seek_index(video)
+        print(f"{video}: {index.frame_count} frames, {len(index.keyframes)} keyframes")
+    return 0
+
+
+def run_probe(args):
+    cache = get_probe_cache(args.probe_cache)
+    results = []
+    for source in args.sources:
+        if os.path.isdir(source) or any(char in source for char in "*?["):
+            results.extend(probe_directory(source, args.recursive, args.exact, args.jobs, cache, args.index_dir))
+        else:
+            results.extend(probe_many([source], args.exact, 1, cache, args.index_dir))
+
+    failed = 0
+    videos = []
+    for video_path, info in results:
+        if isinstance(info, Exception):
+            failed += 1
+            print(f"{video_path}: {info}", file=sys.stderr)
+            continue
+        videos.append(info.as_dict())
+        if not args.json:
+            frames = f"{info.frames}" if info.exact else f"~{info.frames}"
+            print(f"{video_path}: {frames} frames, {info.fps:g} fps, {info.width}x{info.height}, {info.codec}, "
+                  f"{format_duration(info.duration)}")
+    if args.json:
+        print(json.dumps(videos, ensure_ascii=False, indent=2))
+    return 0 if not failed else 2
+
+
+def run_tune(args):
+    for video in args.videos:
+        try:
+            config, results = autotune(video, args.seconds, probe_cache=args.probe_cache)
+        except OSError as e:
+            raise ExtractionError(str(e)) from e
+        print(f"{video} ({tune_key(video, args.probe_cache)}):")
+        for result in results:
+            fps = f"{result['fps']:>9.1f} fps" if result["fps"] is not None else "   unavailable"
+            accuracy = "" if result["accurate"] or result["fps"] is None else "  (frames differ, rejected)"
+            print(f"  {result['backend']:<12} threads={result['threads']:<3} {fps}{accuracy}")
+        print(f"  -> {config.backend}, threads={config.threads}")
+    return 0
+
+
+def print_bench_result(result):
+    accuracy = "" if result.get("accurate", True) else " INACCURATE"
+    print(f"{result['video']:<32} {result['scenario']:<18} {result['rate'] or 0:>10.1f} {result['unit']}/s"
+          f"  ({result['count']} in {result['seconds']:.3f}s, spread {result['spread'] or 0:.1%}){accuracy}")
+
+
+def run_bench(args):
+    try:
+        resolutions = [tuple(int(value) for value in size.lower().split("x", 1)) for size in args.resolutions.split(",")]
+        specs = video_specs(resolutions, args.codecs.split(","), parse_number_list(args.lengths),
+                            parse_number_list(args.gops))
+        benchmark = Benchmark(args.work_dir, args.scenarios.split(",") if args.scenarios else None, args.repeat,
+                              args.language, on_result=None if args.quiet else print_bench_result)
+    except ValueError as e:
+        raise ExtractionError(str(e)) from e
+
+    report = benchmark.run(specs)
+    save_report(report, args.output)
+    print(f"Benchmark results written to {args.output} ({report['elapsed']:.1f}s)")
+    if not args.compare:
+        return 0
+
+    regressions = [c for c in compare_reports(load_report(args.compare), report, args.tolerance) if c["regression"]]
+    for comparison in regressions:
+        print(f"REGRESSION {comparison['video']} {comparison['scenario']}: {comparison['baseline_rate']} -> "
+              f"{comparison['rate']} ({comparison['change']:+.1%})")
+    print(f"{len(regressions)} regression(s) against {args.compare}")
+    return 0 if not regressions else 2
+
+
+def add_job_arguments(parser):
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument("--every", type=int, default=None, metavar="N", help="save every Nth frame of the range")
+    sampling.add_argument("--fps", type=float, default=None, help="save this many frames per second of video")
+    sampling.add_argument("--frames", default=None, metavar="LIST",
+                          help="save only these frame numbers, e.g. 0,120,300-310")
+    sampling.add_argument("--times", default=None, metavar="LIST", help="save the frames at these timestamps in seconds, e.g. 1.5,60")
+    parser.add_argument("--filter", choices=FILTER_MODES, default=None,
+                        help="drop frames too similar to the last kept one (dedupe) or keep only scene cuts (scenes)")
+    parser.add_argument("--filter-metric", choices=FILTER_METRICS, default="mad",
+                        help="frame signature: mean absolute difference, histogram distance or perceptual hash (default: mad)")
+    parser.add_argument("--filter-threshold", type=float, default=None,
+                        help="distance below which a frame is dropped (default depends on the metric)")
+    parser.add_argument("--image-format", choices=IMAGE_FORMATS, default="jpg",
+                        help="frame encoding: jpg, png, webp or raw (lossless .npy) (default: jpg)")
+    parser.add_argument("--quality", type=int, default=None,
+                        help=f"JPEG/WebP quality 1-100 (default: {JPEG_QUALITY})")
+    parser.add_argument("--png-compression", type=int, default=PNG_COMPRESSION,
+                        help=f"PNG compression level 0-9 (default: {PNG_COMPRESSION})")
+    parser.add_argument("--resize", default=None, metavar="SIZE",
+                        help="resize before encoding: WxH, Wx0 / 0xH to keep the aspect ratio, or a scale such as 0.5")
+    parser.add_argument("--crop", default=None, metavar="X,Y,W,H", help="crop this region before resizing and encoding")
+    parser.add_argument("--grayscale", action="store_true", help="convert frames to grayscale before encoding")
+    parser.add_argument("--target", action="append", default=[], metavar="DIR[:SIZE[:FORMAT[:QUALITY]]]",
+                        help="also write every frame to this extra output, e.g. thumbs:160x0:webp:70; relative "
+                             "directories are inside the job output, empty fields reuse the options above (repeatable)")
+    parser.add_argument("--output-format", choices=("files",) + ARCHIVE_FORMATS, default="files",
+                        help="files: one JPEG per frame in subarea folders; shards: JPEGs packed into large .vfa files "
+                             "with an offset index; npy: raw memory-mappable arrays (default: files)")
+    parser.add_argument("--shard-size-mb", type=int, default=SHARD_SIZE >> 20,
+                        help=f"maximum size of one shard or .npy array file in MB (default: {SHARD_SIZE >> 20})")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip frames already recorded in the output directory's extraction_manifest.json")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="decoded frames allowed in flight in pipeline mode (default: 4 per worker)")
+    parser.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                        help="cap the preallocated decoded-frame buffers at this many MB; decoding waits for the "
+                             "encoders when they are all in use (split across processes and batch jobs)")
+    parser.add_argument("--decoder", choices=tuple(DECODER_BACKENDS), default="auto",
+                        help="OpenCV capture backend used to decode (default: auto)")
+    parser.add_argument("--decoder-threads", type=int, default=0,
+                        help="decoder threads (CAP_PROP_N_THREADS), 0 keeps the backend default "
+                             "or, in batch and watch, takes half of each job's share of --threads (default: 0)")
+    parser.add_argument("--autotune-decoder", action="store_true",
+                        help="time the available backends and thread counts on the first seconds of the video, keep "
+                             "the fastest frame-accurate one, and cache it per codec and resolution; "
+                             "--decoder-threads, or a batch job's share, caps its thread count")
+    parser.add_argument("--decoder-cache", default=None, help=f"auto-tune cache file (default: {DEFAULT_TUNE_CACHE})")
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="text",
+                        help="per-frame log: text (extraction_log.txt), jsonl, csv, or none to disable (default: text)")
+    parser.add_argument("--log-flush-lines", type=int, default=FLUSH_LINES,
+                        help=f"flush the frame log after this many lines (default: {FLUSH_LINES})")
+    parser.add_argument("--log-flush-interval", type=float, default=FLUSH_INTERVAL,
+                        help=f"flush the frame log at least every N seconds (default: {FLUSH_INTERVAL})")
+    parser.add_argument("--seek-index", action="store_true",
+                        help="seek through a cached keyframe/PTS index (built on first use)")
+    parser.add_argument("--index-dir", default=None, help="seek index cache directory (default: ~/.cache/VFE/index)")
+    parser.add_argument("--probe-cache", default=None,
+                        help="video metadata cache file (default: ~/.cache/VFE/probe.json)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m VFE", description="Video Frame Extractor (headless)")
+    parser.add_argument("--language", choices=("zh-CN", "en-US"), default=None,
+                        help="message language (default: auto-detect like the GUI)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="extract a frame range from one video")
+    extract.add_argument("video", help="input video file")
+    extract.add_argument("output", help="output directory")
+    extract.add_argument("--start", type=int, default=0, help="first frame to extract (default: 0)")
+    extract.add_argument("--end", type=int, default=None, help="last frame to extract (default: last frame)")
+    add_job_arguments(extract)
+    extract.add_argument("--workers", type=int, default=1,
+                         help="JPEG encoder/writer threads; 1 keeps the serial path, 0 uses every core (default: 1)")
+    extract.add_argument("--processes", type=int, default=1,
+                         help="split the range into segments extracted by this many processes, 0 uses every core (default: 1)")
+    extract.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    extract.set_defaults(func=run_extract)
+
+    batch = subparsers.add_parser("batch", help="extract many videos from a directory, glob or manifest file")
+    batch.add_argument("source", help="directory, glob pattern (quote it) or manifest file listing one video per line")
+    batch.add_argument("output", help="output root; each video gets its own subdirectory")
+    batch.add_argument("--start", type=int, default=0, help="first frame to extract from each video (default: 0)")
+    batch.add_argument("--end", type=int, default=None,
+                       help="last frame to extract from each video (default: last frame, clamped per video)")
+    batch.add_argument("-r", "--recursive", action="store_true", help="also search subdirectories of a source directory")
+    batch.add_argument("--jobs", type=int, default=2, help="videos extracted at the same time (default: 2)")
+    batch.add_argument("--threads", type=int, default=None,
+                       help="total decoder and encoder threads shared by all running jobs (default: number of cores)")
+    add_job_arguments(batch)
+    batch.add_argument("-q", "--quiet", action="store_true", help="only print the final summary")
+    batch.set_defaults(func=run_batch)
+
+    watch = subparsers.add_parser("watch", help="keep extracting new videos as they arrive in a directory")
+    watch.add_argument("source", help="directory to watch for new or changed videos")
+    watch.add_argument("output", help="output root; each video gets its own subdirectory")
+    watch.add_argument("--start", type=int, default=0, help="first frame to extract from each video (default: 0)")
+    watch.add_argument("--end", type=int, default=None,
+                       help="last frame to extract from each video (default: last frame, clamped per video)")
+    watch.add_argument("-r", "--recursive", action="store_true", help="also watch subdirectories")
+    watch.add_argument("--jobs", type=int, default=2, help="videos extracted at the same time (default: 2)")
+    watch.add_argument("--threads", type=int, default=None,
+                       help="total decoder and encoder threads shared by all running jobs (default: number of cores)")
+    watch.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                       help=f"seconds between directory scans (default: {POLL_INTERVAL:g})")
+    watch.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                       help=f"seconds a file's size and mtime must stay unchanged before it is extracted "
+                            f"(default: {SETTLE_SECONDS:g})")
+    watch.add_argument("--state", default=None,
+                       help="file remembering processed videos across restarts (default: OUTPUT/watch_state.json)")
+    watch.add_argument("--once", action="store_true",
+                       help="extract what is already in the directory, then exit instead of watching")
+    add_job_arguments(watch)
+    watch.add_argument("-q", "--quiet", action="store_true", help="do not print per-video updates")
+    watch.set_defaults(func=run_watch)
+
+    index = subparsers.add_parser("index", help="build or refresh the cached seek index of videos")
+    index.add_argument("videos", nargs="+", help="input video files")
+    index.add_argument("--index-dir", default=None, help="seek index cache directory (default: ~/.cache/VFE/index)")
+    index.set_defaults(func=run_index)
+
+    probe = subparsers.add_parser("probe", help="list frame count, fps, resolution, codec and duration of videos")
+    probe.add_argument("sources", nargs="+", help="video files, directories or quoted glob patterns")
+    probe.add_argument("-r", "--recursive", action="store_true", help="also search subdirectories of a directory")
+    probe.add_argument("--exact", action="store_true",
+                       help="count frames by decoding every packet instead of trusting the container (cached, "
+                            "and kept as the seek index)")
+    probe.add_argument("--jobs", type=int, default=PROBE_WORKERS, help=f"videos probed at the same time (default: {PROBE_WORKERS})")
+    probe.add_argument("--json", action="store_true", help="print the results as JSON")
+    probe.add_argument("--probe-cache", default=None, help=f"metadata cache file (default: {DEFAULT_PROBE_CACHE})")
+    probe.add_argument("--index-dir", default=None, help="seek index cache directory used by --exact")
+    probe.set_defaults(func=run_probe)
+
+    tune = subparsers.add_parser("tune", help="compare decoder backends and thread counts on videos")
+    tune.add_argument("videos", nargs="+", help="input video files")
+    tune.add_argument("--seconds", type=float, default=2.0, help="seconds of video decoded per candidate (default: 2)")
+    tune.add_argument("--probe-cache", default=None, help="video metadata cache file (default: ~/.cache/VFE/probe.json)")
+    tune.set_defaults(func=run_tune)
+
+    bench = subparsers.add_parser("bench", help="benchmark extraction on generated synthetic videos")
+    bench.add_argument("--output", default=BENCHMARK_FILENAME, help=f"JSON report path (default: {BENCHMARK_FILENAME})")
+    bench.add_argument("--work-dir", default=None,
+                       help="where synthetic videos and seek indexes are cached (default: VFE-benchmark in the temp dir)")
+    bench.add_argument("--resolutions", default=",".join(f"{w}x{h}" for w, h in DEFAULT_RESOLUTIONS),
+                       help="comma-separated WxH list (default: %(default)s)")
+    bench.add_argument("--codecs", default=",".join(DEFAULT_CODECS), help="comma-separated FourCC list (default: %(default)s)")
+    bench.add_argument("--lengths", default=",".join(map(str, DEFAULT_LENGTHS)),
+                       help="video lengths in frames (default: %(default)s)")
+    bench.add_argument("--gops", default=",".join(map(str, DEFAULT_GOPS)),
+                       help="requested keyframe intervals; the measured one is recorded per video (default: %(default)s)")
+    bench.add_argument("--scenarios", default=None, help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    bench.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                       help="timed runs per scenario after a warm-up; --compare checks the best one (default: %(default)s)")
+    bench.add_argument("--compare", default=None, metavar="BASELINE",
+                       help="earlier report to compare against; exit status 2 on regressions")
+    bench.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                       help=f"allowed slowdown before a result counts as a regression (default: {REGRESSION_TOLERANCE})")
+    bench.add_argument("-q", "--quiet", action="store_true", help="only print the report path")
+    bench.set_defaults(func=run_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ExtractionError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    except KeyboardInterrupt:
+        return 130
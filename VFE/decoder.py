@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from .probe import get_probe_cache, probe
+
+DECODER_BACKENDS = {
+    "auto": "CAP_ANY",
+    "ffmpeg": "CAP_FFMPEG",
+    "gstreamer": "CAP_GSTREAMER",
+    "msmf": "CAP_MSMF",
+    "avfoundation": "CAP_AVFOUNDATION",
+    "mjpeg": "CAP_OPENCV_MJPEG",
+}
+TUNE_VERSION = 2
+DEFAULT_TUNE_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "VFE", "decoder.json")
+TUNE_SECONDS = 2.0
+TUNE_MIN_FRAMES = 30
+THUMBNAIL_SIZE = 32
+ACCURACY_THRESHOLD = 8.0
+
+_tune_lock = threading.Lock()
+
+
+class DecoderConfig:
+    def __init__(self, backend="auto", threads=0):
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"Unknown decoder backend: {backend}")
+        if threads < 0:
+            raise ValueError("Decoder thread count must be 0 (backend default) or more")
+        self.backend = backend
+        self.threads = threads
+
+    def __repr__(self):
+        return f"DecoderConfig({self.backend!r}, threads={self.threads})"
+
+    def __eq__(self, other):
+        return isinstance(other, DecoderConfig) and (self.backend, self.threads) == (other.backend, other.threads)
+
+    def as_dict(self):
+        return {"backend": self.backend, "threads": self.threads}
+
+    @property
+    def api(self):
+        api = getattr(cv2, DECODER_BACKENDS[self.backend], None)
+        if api is None:
+            raise ValueError(f"Decoder backend {self.backend} is not available in this OpenCV build")
+        return api
+
+    def params(self):
+        return [cv2.CAP_PROP_N_THREADS, self.threads] if self.threads else []
+
+    def open(self, video_path):
+        return cv2.VideoCapture(video_path, self.api, self.params())
+
+
+@contextmanager
+def quiet_opencv():
+    # Probing candidates makes OpenCV warn about every backend that cannot open files by name and
+    # every backend that rejects CAP_PROP_N_THREADS; those outcomes are expected and reported anyway.
+    previous = cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_ERROR)
+    try:
+        yield
+    finally:
+        cv2.utils.logging.setLogLevel(previous)
+
+
+def opens_file(config, video_path):
+    try:
+        with quiet_opencv():
+            cap = config.open(video_path)
+        try:
+            return cap.isOpened()
+        finally:
+            cap.release()
+    except (ValueError, cv2.error):
+        return False
+
+
+def available_backends(video_path=None):
+    """Backends of this OpenCV build that decode streams, limited to those that open ``video_path`` if given."""
+    stream_backends = set(cv2.videoio_registry.getStreamBackends())
+    backends = [name for name, constant in DECODER_BACKENDS.items()
+                if name != "auto" and getattr(cv2, constant, None) in stream_backends]
+    if video_path is not None:
+        backends = [name for name in backends if opens_file(DecoderConfig(name), video_path)]
+    return backends
+
+
+def thread_candidates():
+    cpu_count = os.cpu_count() or 1
+    threads = [0, 1]
+    while threads[-1] * 2 <= cpu_count:
+        threads.append(threads[-1] * 2)
+    if cpu_count not in threads:
+        threads.append(cpu_count)
+    return threads
+
+
+def thumbnail(frame):
+    return cv2.resize(frame, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class DecodeSample:
+    def __init__(self, fps, frames, timestamps, seek_frame=None, seek_timestamp=None):
+        self.fps = fps
+        self.frames = frames
+        self.timestamps = timestamps
+        self.seek_frame = seek_frame
+        self.seek_timestamp = seek_timestamp
+
+
+def decode_sample(config, video_path, frame_limit, seek_target):
+    try:
+        with quiet_opencv():
+            cap = config.open(video_path)
+    except (ValueError, cv2.error):
+        return None
+    try:
+        if not cap.isOpened():
+            return None
+        thumbnails = []
+        timestamps = []
+        started = time.perf_counter()
+        while len(thumbnails) < frame_limit and cap.grab():
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            thumbnails.append(thumbnail(frame))
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+        elapsed = time.perf_counter() - started
+        sample = DecodeSample(len(thumbnails) / elapsed if elapsed > 0 else 0.0, thumbnails, timestamps)
+
+        cap.set(cv2.CAP_PROP_POS_FRAMES, seek_target)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == seek_target:
+            ret, frame = cap.read()
+            if ret:
+                sample.seek_frame = thumbnail(frame)
+                sample.seek_timestamp = cap.get(cv2.CAP_PROP_POS_MSEC)
+        return sample
+    finally:
+        cap.release()
+
+
+def frame_distance(first, second):
+    return float(np.mean(np.abs(first - second)))
+
+
+def frame_matches(frame, reference_frames, index):
+    """The frame must look like reference frame ``index`` and not more like either of its neighbours.
+
+    Adjacent frames of smooth footage differ far less than ``ACCURACY_THRESHOLD``, so the threshold
+    alone cannot catch a decoder that is one frame off.
+    """
+    distance = frame_distance(frame, reference_frames[index])
+    if distance >= ACCURACY_THRESHOLD:
+        return False
+    neighbours = [reference_frames[i] for i in (index - 1, index + 1) if 0 <= i < len(reference_frames)]
+    return all(distance <= frame_distance(frame, neighbour) for neighbour in neighbours)
+
+
+def timestamps_match(timestamp, reference_timestamp, tolerance_ms):
+    return timestamp is not None and abs(timestamp - reference_timestamp) <= tolerance_ms
+
+
+def sample_accurate(sample, reference, seek_target, tolerance_ms):
+    if len(sample.frames) != len(reference.frames):
+        return False
+    if not all(timestamps_match(timestamp, reference_timestamp, tolerance_ms)
+               for timestamp, reference_timestamp in zip(sample.timestamps, reference.timestamps)):
+        return False
+    if not all(frame_matches(frame, reference.frames, index) for index, frame in enumerate(sample.frames)):
+        return False
+    if seek_target >= len(reference.frames):
+        return True
+    return (sample.seek_frame is not None
+            and timestamps_match(sample.seek_timestamp, reference.timestamps[seek_target], tolerance_ms)
+            and frame_matches(sample.seek_frame, reference.frames, seek_target))
+
+
+def autotune(video_path, seconds=TUNE_SECONDS, backends=None, threads=None, probe_cache=None):
+    """Time every backend/thread-count pair on the start of the video and return ``(best, results)``.
+
+    A candidate only qualifies when it decodes the same frames as the default decoder, both
+    sequentially and after a POS_FRAMES seek, so picking it cannot shift the extracted range.
+    Frames are compared by timestamp (within half a frame) and by picture.
+    """
+    info = probe(video_path, cache=get_probe_cache(probe_cache), save=False)
+    frame_limit = max(TUNE_MIN_FRAMES, int(info.fps * seconds)) if info.fps > 0 else TUNE_MIN_FRAMES
+    frame_limit = min(frame_limit, info.frames) if info.frames > 0 else frame_limit
+    seek_target = frame_limit * 2 // 3
+    tolerance_ms = 500.0 / info.fps if info.fps > 0 else 1.0
+
+    reference = decode_sample(DecoderConfig(), video_path, frame_limit, seek_target)
+    if reference is None or not reference.frames:
+        raise IOError(f"Cannot open video file: {video_path}")
+
+    results = []
+    for backend in backends or available_backends(video_path):
+        for thread_count in threads or thread_candidates():
+            config = DecoderConfig(backend, thread_count)
+            sample = decode_sample(config, video_path, frame_limit, seek_target)
+            result = {**config.as_dict(), "fps": None, "accurate": False}
+            if sample is not None:
+                result["fps"] = round(sample.fps, 2)
+                result["accurate"] = sample_accurate(sample, reference, seek_target, tolerance_ms)
+            results.append(result)
+
+    accurate = [result for result in results if result["accurate"]]
+    if not accurate:
+        return DecoderConfig(), results
+    best = max(accurate, key=lambda result: result["fps"])
+    return DecoderConfig(best["backend"], best["threads"]), results
+
+
+def tune_key(video_path, probe_cache=None):
+    info = probe(video_path, cache=get_probe_cache(probe_cache), save=False)
+    return f"{info.codec}:{info.width}x{info.height}"
+
+
+def tune_environment():
+    return {"opencv": cv2.__version__, "cpu_count": os.cpu_count()}
+
+
+def load_tune_cache(cache_path=None):
+    try:
+        with open(cache_path or DEFAULT_TUNE_CACHE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != TUNE_VERSION or data.get("environment") != tune_environment():
+        return {}
+    return data.get("configs", {})
+
+
+def save_tune_cache(configs, cache_path=None):
+    cache_path = cache_path or DEFAULT_TUNE_CACHE
+    data = {"version": TUNE_VERSION, "environment": tune_environment(), "configs": configs}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def tuned_config(video_path, cache_path=None, force=False, probe_cache=None):
+    key = tune_key(video_path, probe_cache)
+    with _tune_lock:
+        entry = None if force else load_tune_cache(cache_path).get(key)
+        if entry is not None:
+            return DecoderConfig(entry["backend"], entry["threads"])
+        config, results = autotune(video_path, probe_cache=probe_cache)
+        configs = load_tune_cache(cache_path)
+        configs[key] = {**config.as_dict(), "results": results}
+        save_tune_cache(configs, cache_path)
+        return config
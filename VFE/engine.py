@@ -0,0 +1,793 @@
+import multiprocessing
+import os
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from time import perf_counter
+
+import cv2
+
+from .archive import SHARD_SIZE, ArchiveWriter, merge_archive_parts
+from .buffers import FramePool, FrameRing, frame_shape
+from .decoder import DecoderConfig, tuned_config
+from .framelog import FLUSH_INTERVAL, FLUSH_LINES, LOG_FILENAME, FrameLog, merge_log_parts
+from .i18n import load_language
+from .manifest import CompletionManifest
+from .metrics import METRICS_FILENAME, StageMetrics
+from .output import OutputSettings, OutputTarget, transform_frames, write_bytes
+from .probe import get_probe_cache, probe
+from .sampling import Sampling
+from .seekindex import file_signature, load_or_build_index
+
+FRAMES_PER_SUBFOLDER = 5000
+PROGRESS_INTERVAL = 10
+QUEUE_FRAMES_PER_WORKER = 4
+FRAME_BUFFERS = 4
+SEGMENT_POLL_INTERVAL = 0.2
+PART_PATTERN = re.compile(r"\.part(\d+)\.[^.]+$")
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def frame_filename(output_dir, frame_number, extension="jpg"):
+    subfolder_num = (frame_number // FRAMES_PER_SUBFOLDER) + 1
+    subfolder = os.path.join(output_dir, f"subarea{subfolder_num}")
+    return subfolder, os.path.join(subfolder, f"frame_{frame_number:08d}.{extension}")
+
+
+def find_part_numbers(output_dir):
+    parts = set()
+    for name in os.listdir(output_dir):
+        match = PART_PATTERN.search(name)
+        if match:
+            parts.add(int(match.group(1)))
+    return sorted(parts)
+
+
+def split_segments(frame_numbers, count):
+    count = max(1, min(count, len(frame_numbers)))
+    size, extra = divmod(len(frame_numbers), count)
+    segments = []
+    position = 0
+    for i in range(count):
+        length = size + (1 if i < extra else 0)
+        segments.append(frame_numbers[position:position + length])
+        position += length
+    return segments
+
+
+def segment_sampling(segment):
+    if isinstance(segment, range):
+        return Sampling() if segment.step == 1 else Sampling.every(segment.step)
+    return Sampling.frames(segment)
+
+
+_segment_progress = None
+_segment_stop = None
+
+
+def _init_segment_worker(progress_queue, stop_event):
+    global _segment_progress, _segment_stop
+    _segment_progress = progress_queue
+    _segment_stop = stop_event
+
+
+def _extract_segment(options, segment_id, video_path, output_dir, segment, frame_filter, prime_frame=None):
+    extractor = None
+
+    def on_progress(current, total):
+        _segment_progress.put((segment_id, current, extractor.dropped_count))
+        if _segment_stop.is_set():
+            extractor.stop()
+
+    extractor = FrameExtractor(on_progress=on_progress, part=segment_id, **options)
+    if _segment_stop.is_set():
+        return 0, 0, {}
+    extractor.process_video(video_path, output_dir, segment[0], segment[-1], segment_sampling(segment), frame_filter,
+                            prime_frame)
+    return extractor.saved_count, extractor.dropped_count, extractor.metrics.stages()
+
+
+class FrameExtractor:
+    def __init__(self, language=None, lang=None, on_progress=None, progress_interval=PROGRESS_INTERVAL,
+                 workers=1, queue_size=None, log_format="text", log_flush_lines=FLUSH_LINES,
+                 log_flush_interval=FLUSH_INTERVAL, use_seek_index=False, index_dir=None, processes=1,
+                 part=None, output_format="files", shard_size=SHARD_SIZE, resume=False,
+                 output_settings=None, targets=None, probe_cache=None, memory_budget_mb=None,
+                 decoder_backend="auto", decoder_threads=0, autotune_decoder=False, decoder_cache=None):
+        if lang is None:
+            language, lang = load_language(language)
+        self.language = language or "zh-CN"
+        self.lang = lang
+        self.on_progress = on_progress
+        self.progress_interval = max(1, progress_interval)
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.queue_size = queue_size or self.workers * QUEUE_FRAMES_PER_WORKER
+        self.memory_budget_mb = memory_budget_mb
+        self.frame_pool = None
+        self.log_format = log_format
+        self.log_flush_lines = log_flush_lines
+        self.log_flush_interval = log_flush_interval
+        self.part = part
+        self.frame_log = None
+        self.output_format = output_format
+        self.shard_size = shard_size
+        self.output_settings = output_settings or OutputSettings()
+        self.targets = list(targets or [])
+        self.outputs = []
+        self.archives = []
+        self.resume = resume
+        self.manifest = None
+        self.use_seek_index = use_seek_index
+        self.index_dir = index_dir
+        self.seek_indexes = {}
+        self.probe_cache = probe_cache
+        self.decoder_backend = decoder_backend
+        self.decoder_threads = decoder_threads
+        self.autotune_decoder = autotune_decoder
+        self.decoder_cache = decoder_cache
+        self.decoder = None
+        self.processes = processes if processes and processes > 0 else (os.cpu_count() or 1)
+        self.saved_count = 0
+        self.dropped_count = 0
+        self.total_to_save = 0
+        self.metrics = StageMetrics()
+        self.stop_event = threading.Event()
+
+    def text(self, key, *args):
+        return self.lang.get(key, key).format(*args)
+
+    def stop(self):
+        self.stop_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def report_progress(self, current, total):
+        self.metrics.progress(current, total)
+        if self.on_progress is not None:
+            self.on_progress(current, total)
+
+    def count_frame(self, frame_number, kept=True):
+        if kept:
+            self.saved_count += 1
+        else:
+            self.dropped_count += 1
+        if self.manifest is not None:
+            self.manifest.add(frame_number)
+            if self.manifest.checkpoint_due():
+                self.checkpoint()
+        processed = self.saved_count + self.dropped_count
+        if processed % self.progress_interval == 0:
+            self.report_progress(processed, self.total_to_save)
+
+    def probe(self, video_path, exact=False):
+        try:
+            return probe(video_path, exact, get_probe_cache(self.probe_cache), self.index_dir, save=False)
+        except OSError as e:
+            raise ExtractionError(self.text("video_open_error")) from e
+
+    def get_total_frames(self, video_path):
+        return self.probe(video_path).frames
+
+    def decoder_config(self, video_path):
+        try:
+            if self.autotune_decoder:
+                config = tuned_config(video_path, self.decoder_cache, probe_cache=self.probe_cache)
+                # With a thread limit (a batch job's share), the tuned count is only allowed up to it.
+                if self.decoder_threads and not 0 < config.threads <= self.decoder_threads:
+                    config = DecoderConfig(config.backend, self.decoder_threads)
+                return config
+            return DecoderConfig(self.decoder_backend, self.decoder_threads)
+        except ValueError as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+        except OSError as e:
+            raise ExtractionError(self.text("video_open_error")) from e
+
+    def open_capture(self, video_path):
+        self.decoder = self.decoder_config(video_path)
+        self.metrics.details["decoder"] = self.decoder.as_dict()
+        try:
+            return self.decoder.open(video_path)
+        except (ValueError, cv2.error) as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+
+    def create_log_file(self, output_dir, video_path):
+        log_path = os.path.join(output_dir, LOG_FILENAME)
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(
+                    f"\n\n=== {'新的提取任务' if self.language == 'zh-CN' else 'New Extraction Task'} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+                f.write(f"{'视频文件' if self.language == 'zh-CN' else 'Video File'}: {video_path}\n")
+        except Exception as e:
+            raise ExtractionError(self.text("log_create_error", str(e))) from e
+
+    def write_filter_summary(self, output_dir):
+        log_path = os.path.join(output_dir, LOG_FILENAME)
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(
+                    f"{'帧过滤' if self.language == 'zh-CN' else 'Frame filter'}: {'保留' if self.language == 'zh-CN' else 'kept'} {self.saved_count}, {'丢弃' if self.language == 'zh-CN' else 'dropped'} {self.dropped_count}\n")
+        except Exception as e:
+            raise ExtractionError(self.text("log_write_error", str(e))) from e
+
+    def open_frame_log(self, output_dir):
+        return FrameLog(output_dir, self.log_format, self.language, flush_lines=self.log_flush_lines,
+                        flush_interval=self.log_flush_interval, part=self.part)
+
+    def metrics_summary(self):
+        return {"saved_frames": self.saved_count, "dropped_frames": self.dropped_count, **self.metrics.summary()}
+
+    def save_metrics(self, output_dir=None):
+        if output_dir is None:
+            outputs = self.outputs
+            if not outputs:
+                return
+            output_dir = outputs[0].output_dir
+        try:
+            self.metrics.save(os.path.join(output_dir, METRICS_FILENAME),
+                              saved_frames=self.saved_count, dropped_frames=self.dropped_count)
+        except Exception as e:
+            raise ExtractionError(self.text("log_write_error", str(e))) from e
+
+    def segment_options(self):
+        return {
+            "language": self.language,
+            "lang": self.lang,
+            "progress_interval": self.progress_interval,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "log_format": self.log_format,
+            "log_flush_lines": self.log_flush_lines,
+            "log_flush_interval": self.log_flush_interval,
+            "use_seek_index": self.use_seek_index,
+            "index_dir": self.index_dir,
+            "probe_cache": self.probe_cache,
+            "memory_budget_mb": self.memory_budget_mb / self.processes if self.memory_budget_mb else None,
+            # Segments reuse the decoder picked (or tuned) by the parent instead of tuning again.
+            "decoder_backend": self.decoder.backend if self.decoder else self.decoder_backend,
+            "decoder_threads": self.decoder.threads if self.decoder else self.decoder_threads,
+            "decoder_cache": self.decoder_cache,
+            "output_format": self.output_format,
+            "shard_size": self.shard_size,
+            "output_settings": self.output_settings,
+            "targets": self.targets,
+        }
+
+    def job_identity(self, video_path, frame_filter=None):
+        identity = {"video": file_signature(video_path), "output_format": self.output_format,
+                    "output": self.output_settings.as_dict()}
+        if self.targets:
+            identity["targets"] = [target.as_dict() for target in self.targets]
+        # Frames a filter dropped are recorded as done too, so they only count for the same filter.
+        if frame_filter is not None:
+            identity["filter"] = frame_filter.as_dict()
+        return identity
+
+    def job_outputs(self, output_dir):
+        primary = OutputTarget(output_dir, self.output_settings, self.output_format)
+        return [primary] + [target.resolve(output_dir) for target in self.targets]
+
+    def run_job(self, video_path, output_dir, start=0, end=None, sampling=None, frame_filter=None):
+        total_frames = self.get_total_frames(video_path)
+        end = total_frames - 1 if end is None else end
+        if start < 0 or end >= total_frames or start > end:
+            raise ExtractionError(self.text("invalid_frames", total_frames - 1))
+
+        if not os.path.exists(output_dir):
+            try:
+                os.makedirs(output_dir)
+            except Exception as e:
+                raise ExtractionError(self.text("dir_create_error", str(e))) from e
+
+        self.create_log_file(output_dir, video_path)
+        return self.process_video(video_path, output_dir, start, end, sampling, frame_filter)
+
+    def process_video(self, video_path, output_dir, start, end, sampling=None, frame_filter=None, prime_frame=None):
+        if frame_filter is not None and frame_filter.mode == "dedupe" and self.processes > 1:
+            raise ExtractionError(self.text("dedupe_processes_error"))
+        self.stop_event.clear()
+        self.saved_count = 0
+        self.dropped_count = 0
+        self.metrics.reset()
+        cap = self.open_capture(video_path)
+        self.outputs = self.job_outputs(output_dir)
+        failed = False
+        try:
+            self.frame_log = self.open_frame_log(output_dir)
+            if not cap.isOpened():
+                raise ExtractionError(self.text("video_open_error"))
+            self.create_target_dirs()
+
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+
+            frame_numbers = (sampling or Sampling()).frame_numbers(start, end, cap.get(cv2.CAP_PROP_FPS))
+            self.open_manifest(video_path, output_dir, frame_filter)
+            if self.resume and self.part is None:
+                frame_numbers = self.manifest.missing(frame_numbers)
+            if not frame_numbers:
+                return 0
+            start = frame_numbers[0]
+            self.total_to_save = len(frame_numbers)
+            self.metrics.progress(0, self.total_to_save)
+
+            index = self.get_seek_index(video_path) if self.use_seek_index else None
+            if self.processes > 1 and len(frame_numbers) > 1:
+                cap.release()
+                self.process_segments(video_path, output_dir, frame_numbers, frame_filter)
+                return self.finish_job(output_dir, frame_filter)
+
+            if frame_filter is None:
+                prime_frame = None
+            read_numbers = frame_numbers if prime_frame is None else [prime_frame, *frame_numbers]
+            actual_start = self.seek_start(cap, read_numbers[0], index)
+
+            self.open_archives(len(frame_numbers))
+            self.frame_pool = self.create_frame_pool(cap)
+            frames = self.read_frames(cap, read_numbers, actual_start, index, self.frame_pool)
+            if frame_filter is not None:
+                frames = self.filter_frames(frames, frame_filter, prime_frame)
+            if self.workers > 1:
+                self.save_frames_pipelined(frames, output_dir)
+            else:
+                self.save_frames(frames, output_dir)
+            return self.finish_job(output_dir, frame_filter)
+        except ExtractionError:
+            failed = True
+            raise
+        except Exception as e:
+            failed = True
+            raise ExtractionError(self.text("process_error", str(e))) from e
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.outputs = []
+            self.frame_pool = None
+            cap.release()
+            error = self.close_job(output_dir)
+            # A cleanup error only surfaces when the job itself succeeded; otherwise it would hide the cause.
+            if error is not None and not failed:
+                raise error
+
+    def close_job(self, output_dir):
+        """Close the log, archives and manifest and save the metrics, each even if an earlier step fails.
+
+        Returns the first error, so a full disk that broke the log still leaves the archive index and
+        the manifest saved for resuming.
+        """
+        error = None
+        for close in (self.close_frame_log, self.close_archives, self.close_manifest):
+            try:
+                close()
+            except ExtractionError as e:
+                error = error or e
+        self.metrics.progress(self.saved_count + self.dropped_count)
+        self.metrics.finish()
+        if self.part is None and os.path.isdir(output_dir):
+            try:
+                self.save_metrics(output_dir)
+            except ExtractionError as e:
+                error = error or e
+        return error
+
+    def create_target_dirs(self):
+        for target in self.outputs[1:]:
+            try:
+                os.makedirs(target.output_dir, exist_ok=True)
+            except Exception as e:
+                raise ExtractionError(self.text("dir_create_error", str(e))) from e
+
+    def iter_frames(self, video_path, start=0, end=None, sampling=None, frame_filter=None,
+                    buffers=FRAME_BUFFERS, copy=False):
+        """Yield ``(frame_number, timestamp, frame)`` for the selected frames, writing nothing to disk.
+
+        Frames are decoded into a ring of ``buffers`` preallocated arrays, so a yielded array is
+        overwritten ``buffers`` frames later. Pass ``copy=True`` to get a new array per frame.
+        """
+        self.stop_event.clear()
+        self.saved_count = 0
+        self.dropped_count = 0
+        self.metrics.reset()
+        cap = self.open_capture(video_path)
+        try:
+            if not cap.isOpened():
+                raise ExtractionError(self.text("video_open_error"))
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+
+            total_frames = self.get_total_frames(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            end = total_frames - 1 if end is None else end
+            if start < 0 or end >= total_frames or start > end:
+                raise ExtractionError(self.text("invalid_frames", total_frames - 1))
+            frame_numbers = (sampling or Sampling()).frame_numbers(start, end, fps)
+            if not frame_numbers:
+                return
+            self.total_to_save = len(frame_numbers)
+            self.metrics.progress(0, self.total_to_save)
+
+            index = self.get_seek_index(video_path) if self.use_seek_index else None
+            actual_start = self.seek_start(cap, frame_numbers[0], index)
+            ring = None if copy else FrameRing(frame_shape(cap), buffers)
+            frames = self.read_frames(cap, frame_numbers, actual_start, index, ring)
+            if frame_filter is not None:
+                frames = self.filter_frames(frames, frame_filter)
+            for frame_number, frame in frames:
+                self.count_frame(frame_number)
+                yield frame_number, frame_number / fps if fps > 0 else 0.0, frame
+        except ExtractionError:
+            raise
+        except Exception as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+        finally:
+            cap.release()
+            self.metrics.finish()
+
+    def frames_in_flight(self, frame_bytes):
+        frames = self.queue_size if self.workers > 1 else 1
+        if self.memory_budget_mb:
+            frames = min(frames, int(self.memory_budget_mb * (1 << 20)) // max(1, frame_bytes))
+        return max(1, frames)
+
+    def create_frame_pool(self, cap):
+        shape = frame_shape(cap)
+        pool = FramePool(shape, self.frames_in_flight(shape[0] * shape[1] * shape[2]))
+        self.metrics.details.update(frame_buffers=len(pool), frame_buffer_mb=round(pool.nbytes / (1 << 20), 2))
+        return pool
+
+    def release_frame(self, frame):
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def open_manifest(self, video_path, output_dir, frame_filter=None):
+        try:
+            parts = self.recover_parts(output_dir) if self.part is None else []
+            self.manifest = CompletionManifest.load(output_dir, self.job_identity(video_path, frame_filter), self.part)
+            self.manifest.merge_parts(output_dir, parts)
+        except Exception as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+
+    def recover_parts(self, output_dir):
+        parts = find_part_numbers(output_dir) if os.path.isdir(output_dir) else []
+        if parts:
+            for log_format in ("text", "jsonl", "csv"):
+                merge_log_parts(output_dir, log_format, parts)
+        for target in self.outputs:
+            target_parts = find_part_numbers(target.output_dir) if os.path.isdir(target.output_dir) else []
+            if target_parts:
+                merge_archive_parts(target.output_dir, target_parts)
+        return parts
+
+    def checkpoint(self):
+        try:
+            for archive in self.archives:
+                if archive is not None:
+                    archive.checkpoint()
+            self.manifest.save()
+        except Exception as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+
+    def close_manifest(self):
+        manifest, self.manifest = self.manifest, None
+        if manifest is None:
+            return
+        try:
+            manifest.save()
+        except Exception as e:
+            raise ExtractionError(self.text("process_error", str(e))) from e
+
+    def open_archives(self, capacity):
+        try:
+            for target in self.outputs:
+                if target.output_format == "files":
+                    self.archives.append(None)
+                else:
+                    self.archives.append(ArchiveWriter(target.output_dir, target.output_format,
+                                                       target.settings.extension, shard_size=self.shard_size,
+                                                       capacity=capacity, part=self.part))
+        except Exception as e:
+            raise ExtractionError(self.text("dir_create_error", str(e))) from e
+
+    def close_archives(self):
+        archives, self.archives = self.archives, []
+        error = None
+        for archive in archives:
+            if archive is None:
+                continue
+            try:
+                archive.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise ExtractionError(self.text("process_error", str(error))) from error
+
+    def finish_job(self, output_dir, frame_filter):
+        if frame_filter is not None:
+            self.close_frame_log()
+            self.write_filter_summary(output_dir)
+        return self.saved_count
+
+    def process_segments(self, video_path, output_dir, frame_numbers, frame_filter):
+        segments = split_segments(frame_numbers, self.processes)
+        parts = list(range(1, len(segments) + 1))
+        # A scene filter compares each frame with the one before it, so every segment after the first
+        # starts from the last sampled frame of the previous segment, as a single process would.
+        primes = [None] + [segment[-1] for segment in segments[:-1]]
+
+        context = multiprocessing.get_context("spawn")
+        progress_queue = context.Queue()
+        stop_event = context.Event()
+        progress = {part: (0, 0) for part in parts}
+        error = None
+
+        def drain_progress():
+            while True:
+                try:
+                    part, processed, dropped = progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+                progress[part] = max(progress[part], (processed, dropped))
+            self.dropped_count = sum(dropped for _, dropped in progress.values())
+            self.report_progress(sum(processed for processed, _ in progress.values()), self.total_to_save)
+
+        with ProcessPoolExecutor(max_workers=len(segments), mp_context=context,
+                                 initializer=_init_segment_worker, initargs=(progress_queue, stop_event)) as executor:
+            futures = {
+                executor.submit(_extract_segment, self.segment_options(), part, video_path, output_dir,
+                                segment, frame_filter, prime): part
+                for part, segment, prime in zip(parts, segments, primes)
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=SEGMENT_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        saved, dropped, stages = future.result()
+                        progress[futures[future]] = max(progress[futures[future]], (saved + dropped, dropped))
+                        self.saved_count += saved
+                        self.metrics.merge(stages)
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        stop_event.set()
+                if self.stopped:
+                    stop_event.set()
+                drain_progress()
+
+        merge_log_parts(output_dir, self.log_format, parts)
+        for target in self.outputs:
+            if target.output_format != "files":
+                merge_archive_parts(target.output_dir, parts)
+        self.manifest.merge_parts(output_dir, parts)
+        if error is not None:
+            if isinstance(error, ExtractionError):
+                raise error
+            raise ExtractionError(self.text("process_error", str(error))) from error
+
+    def close_frame_log(self):
+        frame_log, self.frame_log = self.frame_log, None
+        if frame_log is None:
+            return
+        try:
+            frame_log.close()
+        except Exception as e:
+            raise ExtractionError(self.text("log_write_error", str(e))) from e
+
+    def read_frames(self, cap, frame_numbers, position, index=None, buffers=None):
+        first = True
+        for frame_number in frame_numbers:
+            if self.stopped:
+                break
+            started = perf_counter()
+            if index is not None and index.keyframe_before(frame_number) > position:
+                position = self.seek_with_index(cap, frame_number, index)
+                self.metrics.add("seek", perf_counter() - started)
+            elif position < frame_number:
+                skipped = position
+                position = self.grab_until(cap, position, frame_number)
+                self.metrics.add("grab", perf_counter() - started, position - skipped)
+            if position != frame_number:
+                break
+
+            started = perf_counter()
+            ret = cap.grab()
+            grabbed = perf_counter()
+            if ret and buffers is None:
+                ret, frame = cap.retrieve()
+            elif ret:
+                # retrieve() decodes in place when the buffer matches the stream, otherwise it allocates.
+                buffer = buffers.acquire()
+                ret, frame = cap.retrieve(buffer)
+                if not ret:
+                    buffers.release(buffer)
+                elif frame is not buffer:
+                    buffers.replace(buffer, frame)
+            self.metrics.add("grab", grabbed - started)
+            self.metrics.add("retrieve", perf_counter() - grabbed)
+            if not ret:
+                if first:
+                    raise ExtractionError(self.text("frame_read_error", frame_number))
+                break
+            first = False
+            position += 1
+            yield frame_number, frame
+
+    def filter_frames(self, frames, frame_filter, prime_frame=None):
+        frame_filter.reset()
+        for frame_number, frame in frames:
+            started = perf_counter()
+            accepted = frame_filter.accept(frame)
+            self.metrics.add("filter", perf_counter() - started)
+            if frame_number == prime_frame:
+                # Only sets the filter's reference; the previous segment saves or drops this frame.
+                self.release_frame(frame)
+            elif accepted:
+                yield frame_number, frame
+            else:
+                self.release_frame(frame)
+                self.count_frame(frame_number, kept=False)
+
+    def save_frames(self, frames, output_dir):
+        for frame_number, frame in frames:
+            self.save_frame(frame, frame_number, output_dir)
+            self.release_frame(frame)
+            self.count_frame(frame_number)
+
+    def save_frames_pipelined(self, frames, output_dir):
+        pending = deque()
+
+        # Every pending frame holds a pool buffer until it is committed, so draining below the pool size
+        # before the next read is what makes decoding wait for the encoders when the budget is used up.
+        limit = min(self.queue_size, len(self.frame_pool)) if self.frame_pool is not None else self.queue_size
+
+        def complete_oldest():
+            frame_number, frame, future = pending.popleft()
+            filename = self.commit_frame(frame_number, future.result())
+            self.release_frame(frame)
+            self.write_log(output_dir, frame_number, filename)
+            self.count_frame(frame_number)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="VFE-encoder")
+        try:
+            for frame_number, frame in frames:
+                pending.append((frame_number, frame,
+                                executor.submit(self.encode_frame, frame, frame_number, output_dir)))
+                while len(pending) >= limit or (pending and pending[0][2].done()):
+                    complete_oldest()
+
+            while pending:
+                complete_oldest()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_seek_index(self, video_path):
+        key = os.path.abspath(video_path)
+        index = self.seek_indexes.get(key)
+        if index is None:
+            try:
+                index = load_or_build_index(video_path, self.index_dir, self.stop_event)
+            except Exception as e:
+                raise ExtractionError(self.text("seek_error", str(e))) from e
+            if index is not None:
+                self.seek_indexes[key] = index
+        return index
+
+    def seek_start(self, cap, start, index=None):
+        actual_start = self.seek_to_frame(cap, start, index)
+        if actual_start != start:
+            raise ExtractionError(
+                f"{'无法定位到起始帧' if self.language == 'zh-CN' else 'Cannot seek to start frame'} {start}，{'实际定位到' if self.language == 'zh-CN' else 'actual position'} {actual_start}")
+        return actual_start
+
+    def seek_to_frame(self, cap, target_frame, index=None):
+        started = perf_counter()
+        try:
+            if index is not None and target_frame < index.frame_count:
+                return self.seek_with_index(cap, target_frame, index)
+
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+            actual_pos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+            while actual_pos < target_frame and cap.isOpened():
+                ret = cap.grab()
+                if not ret:
+                    break
+                actual_pos += 1
+
+            return actual_pos
+        except Exception as e:
+            raise ExtractionError(self.text("seek_error", str(e))) from e
+        finally:
+            self.metrics.add("seek", perf_counter() - started)
+
+    def seek_with_index(self, cap, target_frame, index):
+        keyframe = index.keyframe_before(target_frame)
+        actual_pos = 0
+        if keyframe > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            actual_pos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if actual_pos != keyframe:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                actual_pos = 0
+
+        actual_pos = self.grab_until(cap, actual_pos, target_frame)
+        if 0 < actual_pos == target_frame and int(cap.get(cv2.CAP_PROP_PTS)) != index.pts[target_frame - 1]:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            actual_pos = self.grab_until(cap, 0, target_frame)
+        return actual_pos
+
+    def grab_until(self, cap, position, target_frame):
+        while position < target_frame and not self.stopped:
+            if not cap.grab():
+                break
+            position += 1
+        return position
+
+    def save_frame(self, frame, frame_number, output_dir):
+        filename = self.commit_frame(frame_number, self.encode_frame(frame, frame_number, output_dir))
+        self.write_log(output_dir, frame_number, filename)
+        return filename
+
+    def commit_frame(self, frame_number, encoded):
+        locations = []
+        try:
+            for position, result in enumerate(encoded):
+                archive = self.archives[position] if position < len(self.archives) else None
+                if archive is None:
+                    locations.append(result)
+                    continue
+                started = perf_counter()
+                locations.append(archive.append(frame_number, result))
+                self.metrics.add("write", perf_counter() - started)
+        except Exception as e:
+            raise ExtractionError(self.text("frame_save_error", frame_number, str(e))) from e
+        return "; ".join(locations)
+
+    def encode_frame(self, frame, frame_number, output_dir):
+        outputs = self.outputs or self.job_outputs(output_dir)
+        results = []
+        try:
+            if frame is None or frame.size == 0:
+                raise ValueError("无效的帧数据" if self.language == "zh-CN" else "Invalid frame data")
+
+            started = perf_counter()
+            frames = transform_frames([target.settings for target in outputs], frame)
+            self.metrics.add("transform", perf_counter() - started)
+            for target, frame in zip(outputs, frames):
+                if target.output_format == "npy":
+                    results.append(frame)
+                    continue
+                started = perf_counter()
+                encoded = target.settings.encode(frame)
+                self.metrics.add("encode", perf_counter() - started)
+                if target.output_format != "files":
+                    results.append(encoded)
+                    continue
+
+                started = perf_counter()
+                subfolder, filename = frame_filename(target.output_dir, frame_number, target.settings.extension)
+                os.makedirs(subfolder, exist_ok=True)
+                write_bytes(encoded, filename)
+                self.metrics.add("write", perf_counter() - started)
+                results.append(filename)
+        except Exception as e:
+            raise ExtractionError(self.text("frame_save_error", frame_number, str(e))) from e
+        return results
+
+    def write_log(self, output_dir, frame_number, filename):
+        started = perf_counter()
+        try:
+            if self.frame_log is not None:
+                self.frame_log.write(frame_number, filename)
+            else:
+                with self.open_frame_log(output_dir) as frame_log:
+                    frame_log.write(frame_number, filename)
+        except Exception as e:
+            raise ExtractionError(self.text("log_write_error", str(e))) from e
+        self.metrics.add("log", perf_counter() - started)
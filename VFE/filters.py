@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+FILTER_MODES = ("dedupe", "scenes")
+FILTER_METRICS = ("mad", "hist", "phash")
+DEFAULT_THRESHOLDS = {
+    "mad": 4.0,
+    "hist": 0.25,
+    "phash": 6,
+}
+SIGNATURE_SIZE = (64, 36)
+HIST_BINS = 32
+
+
+class FrameFilter:
+    def __init__(self, mode="dedupe", metric="mad", threshold=None, size=SIGNATURE_SIZE):
+        if mode not in FILTER_MODES:
+            raise ValueError(f"Unknown filter mode: {mode}")
+        if metric not in FILTER_METRICS:
+            raise ValueError(f"Unknown filter metric: {metric}")
+        self.mode = mode
+        self.metric = metric
+        self.threshold = DEFAULT_THRESHOLDS[metric] if threshold is None else threshold
+        self.size = size
+        self.reference = None
+
+    def as_dict(self):
+        return {"mode": self.mode, "metric": self.metric, "threshold": self.threshold, "size": list(self.size)}
+
+    def reset(self):
+        self.reference = None
+
+    def signature(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.metric == "phash":
+            small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+            return small[:, 1:] > small[:, :-1]
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if self.metric == "hist":
+            hist = np.bincount((small >> 3).ravel(), minlength=HIST_BINS).astype(np.float32)
+            return hist / hist.sum()
+        return small.astype(np.int16)
+
+    def distance(self, a, b):
+        if self.metric == "phash":
+            return int(np.count_nonzero(a != b))
+        if self.metric == "hist":
+            return float(np.abs(a - b).sum())
+        return float(np.abs(a - b).mean())
+
+    def accept(self, frame):
+        signature = self.signature(frame)
+        if self.reference is None:
+            self.reference = signature
+            return True
+
+        keep = self.distance(signature, self.reference) >= self.threshold
+        if keep or self.mode == "scenes":
+            self.reference = signature
+        return keep
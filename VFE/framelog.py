@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+LOG_FILENAME = "extraction_log.txt"
+LOG_FORMATS = ("text", "jsonl", "csv", "none")
+LOG_FILENAMES = {
+    "text": LOG_FILENAME,
+    "jsonl": "extraction_log.jsonl",
+    "csv": "extraction_log.csv",
+}
+FLUSH_LINES = 1000
+FLUSH_INTERVAL = 2.0
+
+
+def log_filename(log_format, part=None):
+    filename = LOG_FILENAMES[log_format]
+    if part is None:
+        return filename
+    base, extension = os.path.splitext(filename)
+    return f"{base}.part{part}{extension}"
+
+
+def merge_log_parts(output_dir, log_format, parts):
+    if log_format == "none":
+        return
+    parts = [part for part in parts if os.path.exists(os.path.join(output_dir, log_filename(log_format, part)))]
+    if not parts:
+        return
+    target_path = os.path.join(output_dir, log_filename(log_format))
+    write_header = log_format == "csv" and not os.path.exists(target_path)
+    with open(target_path, 'a', encoding='utf-8', newline='') as target:
+        if write_header:
+            target.write("time,frame,file\r\n")
+        for part in parts:
+            part_path = os.path.join(output_dir, log_filename(log_format, part))
+            if not os.path.exists(part_path):
+                continue
+            with open(part_path, 'r', encoding='utf-8', newline='') as f:
+                if log_format == "csv":
+                    f.readline()
+                for chunk in iter(lambda: f.read(1 << 20), ""):
+                    target.write(chunk)
+            os.remove(part_path)
+
+
+class FrameLog:
+    def __init__(self, output_dir, log_format="text", language="zh-CN",
+                 flush_lines=FLUSH_LINES, flush_interval=FLUSH_INTERVAL, part=None):
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format: {log_format}")
+        self.log_format = log_format
+        self.language = language
+        self.flush_lines = max(1, flush_lines)
+        self.flush_interval = flush_interval
+        self.path = os.path.join(output_dir, log_filename(log_format, part)) if log_format != "none" else None
+        self.lines = []
+        self.last_flush = time.monotonic()
+        self.clock_second = None
+        self.clock_text = ""
+        self.file = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self.enabled and self.file is None:
+            write_header = self.log_format == "csv" and not os.path.exists(self.path)
+            self.file = open(self.path, 'a', encoding='utf-8', newline='')
+            if write_header:
+                self.file.write("time,frame,file\r\n")
+
+    def timestamp(self):
+        now = int(time.time())
+        if now != self.clock_second:
+            self.clock_second = now
+            self.clock_text = datetime.fromtimestamp(now).strftime('%H:%M:%S')
+        return self.clock_text
+
+    def format_line(self, frame_number, filename):
+        if self.log_format == "jsonl":
+            return json.dumps({"time": self.timestamp(), "frame": frame_number, "file": filename}, ensure_ascii=False) + "\n"
+        if self.log_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow((self.timestamp(), frame_number, filename))
+            return buffer.getvalue()
+        return f"{self.timestamp()} - {'已保存帧' if self.language == 'zh-CN' else 'Saved frame'} {frame_number} {'到' if self.language == 'zh-CN' else 'to'} {filename}\n"
+
+    def write(self, frame_number, filename):
+        if not self.enabled:
+            return
+        self.lines.append(self.format_line(frame_number, filename))
+        if len(self.lines) >= self.flush_lines or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.lines:
+            return
+        self.open()
+        self.file.write("".join(self.lines))
+        self.file.flush()
+        self.lines.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,47 @@
+import json
+import os
+
+DEFAULT_LANGUAGE = "zh-CN"
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_LANGUAGES_DIR = os.path.join(PACKAGE_DIR, "Languages")
+LANGUAGE_DIRS = ("Languages", PACKAGE_LANGUAGES_DIR)
+LANGUAGE_LOAD_DIRS = LANGUAGE_DIRS + (os.path.dirname(PACKAGE_DIR),)
+
+FALLBACK_STRINGS = {
+    "app_title": "视频帧提取工具",
+    "menu_help": "帮助",
+    "menu_instructions": "使用说明",
+    "menu_precautions": "注意事项"
+}
+
+
+def language_file(language, search_dirs=LANGUAGE_DIRS):
+    for base_dir in search_dirs:
+        path = os.path.join(base_dir, f"{language}.json")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def detect_language():
+    if language_file("en-US"):
+        return "en-US"
+    return DEFAULT_LANGUAGE
+
+
+def load_language_strings(language):
+    lang_file = language_file(language, LANGUAGE_LOAD_DIRS) or os.path.join("Languages", f"{language}.json")
+    with open(lang_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_language(language=None):
+    language = language or detect_language()
+    try:
+        return language, load_language_strings(language)
+    except Exception as e:
+        print(f"Error loading language file: {e}")
+        try:
+            return DEFAULT_LANGUAGE, load_language_strings(DEFAULT_LANGUAGE)
+        except Exception:
+            return DEFAULT_LANGUAGE, dict(FALLBACK_STRINGS)
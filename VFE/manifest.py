@@ -0,0 +1,115 @@
+import bisect
+import json
+import os
+import time
+
+MANIFEST_FILENAME = "extraction_manifest.json"
+MANIFEST_VERSION = 1
+CHECKPOINT_FRAMES = 500
+CHECKPOINT_INTERVAL = 5.0
+
+
+def manifest_filename(part=None):
+    if part is None:
+        return MANIFEST_FILENAME
+    base, extension = os.path.splitext(MANIFEST_FILENAME)
+    return f"{base}.part{part}{extension}"
+
+
+def merge_ranges(ranges):
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+class CompletionManifest:
+    def __init__(self, output_dir, identity=None, part=None,
+                 checkpoint_frames=CHECKPOINT_FRAMES, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = os.path.join(output_dir, manifest_filename(part))
+        self.identity = identity or {}
+        self.ranges = []
+        self.sorted = True
+        self.checkpoint_frames = checkpoint_frames
+        self.checkpoint_interval = checkpoint_interval
+        self.unsaved = 0
+        self.last_save = time.monotonic()
+
+    @classmethod
+    def load(cls, output_dir, identity=None, part=None, **kwargs):
+        manifest = cls(output_dir, identity, part, **kwargs)
+        if os.path.exists(manifest.path):
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION and (identity is None or data.get("identity") == identity):
+                manifest.identity = data.get("identity", manifest.identity)
+                manifest.ranges = merge_ranges(data.get("ranges", []))
+        return manifest
+
+    def __contains__(self, frame_number):
+        self.normalize()
+        position = bisect.bisect_right(self.ranges, [frame_number, float("inf")]) - 1
+        return position >= 0 and self.ranges[position][0] <= frame_number <= self.ranges[position][1]
+
+    @property
+    def count(self):
+        self.normalize()
+        return sum(last - first + 1 for first, last in self.ranges)
+
+    def normalize(self):
+        if not self.sorted:
+            self.ranges = merge_ranges(self.ranges)
+            self.sorted = True
+
+    def add(self, frame_number):
+        last = self.ranges[-1] if self.ranges else None
+        if last is not None and last[0] <= frame_number <= last[1] + 1:
+            last[1] = max(last[1], frame_number)
+        else:
+            if last is not None and frame_number < last[0]:
+                self.sorted = False
+            self.ranges.append([frame_number, frame_number])
+        self.unsaved += 1
+
+    def update(self, other):
+        self.ranges.extend(other.ranges)
+        self.sorted = False
+        self.unsaved += 1
+
+    def missing(self, frame_numbers):
+        self.normalize()
+        if not self.ranges:
+            return frame_numbers
+        missing = []
+        position = 0
+        for frame_number in frame_numbers:
+            while position < len(self.ranges) and self.ranges[position][1] < frame_number:
+                position += 1
+            if position == len(self.ranges) or frame_number < self.ranges[position][0]:
+                missing.append(frame_number)
+        return missing
+
+    def checkpoint_due(self):
+        return self.unsaved >= self.checkpoint_frames or (
+            self.unsaved and time.monotonic() - self.last_save >= self.checkpoint_interval)
+
+    def merge_parts(self, output_dir, parts):
+        for part in parts:
+            part_path = os.path.join(output_dir, manifest_filename(part))
+            if not os.path.exists(part_path):
+                continue
+            self.update(CompletionManifest.load(output_dir, self.identity, part))
+            os.remove(part_path)
+
+    def save(self):
+        self.normalize()
+        data = {"version": MANIFEST_VERSION, "identity": self.identity, "ranges": self.ranges}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+        self.last_save = time.monotonic()
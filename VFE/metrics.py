@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+METRICS_FILENAME = "extraction_metrics.json"
+STAGES = ("seek", "grab", "retrieve", "filter", "transform", "encode", "write", "log")
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or of its finished child processes) in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+    if children:
+        return None
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, "peak_wset", info.rss) / (1 << 20), 1)
+
+
+class StageMetrics:
+    """Accumulated wall time and call counts per pipeline stage, plus job throughput.
+
+    Stages that run on encoder threads overlap with decoding, so their seconds can add up to
+    more than the elapsed time; compare shares to see which stage needs more cores.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total=0):
+        with self.lock:
+            self.seconds = dict.fromkeys(STAGES, 0.0)
+            self.counts = dict.fromkeys(STAGES, 0)
+            self.started = time.monotonic()
+            self.finished = None
+            self.processed = 0
+            self.total = total
+            self.details = {}
+
+    def add(self, stage, seconds, count=1):
+        with self.lock:
+            self.seconds[stage] += seconds
+            self.counts[stage] += count
+
+    def merge(self, stages):
+        with self.lock:
+            for stage, values in stages.items():
+                self.seconds[stage] += values["seconds"]
+                self.counts[stage] += values["count"]
+
+    def progress(self, processed, total=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def fps(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        fps = self.fps
+        if not fps:
+            return None
+        return max(0.0, (self.total - self.processed) / fps)
+
+    def stages(self):
+        with self.lock:
+            busy = sum(self.seconds.values())
+            return {
+                stage: {
+                    "count": self.counts[stage],
+                    "seconds": round(self.seconds[stage], 4),
+                    "mean_ms": round(self.seconds[stage] * 1000 / self.counts[stage], 4),
+                    "share": round(self.seconds[stage] / busy, 4) if busy else 0.0,
+                }
+                for stage in STAGES if self.counts[stage]
+            }
+
+    def summary(self):
+        eta = self.eta
+        return {
+            "processed": self.processed,
+            "total": self.total,
+            "elapsed": round(self.elapsed, 3),
+            "fps": round(self.fps, 2),
+            "eta": None if eta is None else round(eta, 1),
+            "finished": self.finished is not None,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_children_rss_mb": peak_rss_mb(children=True),
+            **self.details,
+            "stages": self.stages(),
+        }
+
+    def save(self, path, **extra):
+        # The SIGUSR1 thread may save while the job saves its final metrics; one writer at a time, and a
+        # temporary name of our own in case another process writes the same file.
+        with self.save_lock:
+            summary = {**extra, **self.summary()}
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        return summary
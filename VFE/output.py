@@ -0,0 +1,211 @@
+import copy
+import io
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_FORMATS = ("jpg", "png", "webp", "raw")
+IMAGE_EXTENSIONS = {"jpg": "jpg", "png": "png", "webp": "webp", "raw": "npy"}
+JPEG_QUALITY = 90
+PNG_COMPRESSION = 3
+WEBP_QUALITY = 90
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if not text:
+        return None
+    if "x" in text:
+        width, height = (int(value) for value in text.split("x", 1))
+        if width <= 0 and height <= 0:
+            raise ValueError(f"Invalid size: {text}")
+        return width, height
+    scale = float(text)
+    if scale <= 0:
+        raise ValueError(f"Invalid scale: {text}")
+    return scale
+
+
+def parse_crop(text):
+    text = text.strip()
+    if not text:
+        return None
+    values = tuple(int(value) for value in text.replace("x", ",").split(","))
+    if len(values) != 4 or values[0] < 0 or values[1] < 0 or values[2] <= 0 or values[3] <= 0:
+        raise ValueError(f"Invalid crop region (x,y,w,h): {text}")
+    return values
+
+
+class OutputSettings:
+    def __init__(self, image_format="jpg", quality=None, png_compression=PNG_COMPRESSION,
+                 resize=None, crop=None, grayscale=False, interpolation=cv2.INTER_AREA):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("Quality must be between 1 and 100")
+        if not 0 <= png_compression <= 9:
+            raise ValueError("PNG compression level must be between 0 and 9")
+        self.image_format = image_format
+        self.quality = quality
+        self.png_compression = png_compression
+        self.resize = resize
+        self.crop = crop
+        self.grayscale = grayscale
+        self.interpolation = interpolation
+
+    def __repr__(self):
+        return (f"OutputSettings({self.image_format!r}, quality={self.quality!r}, resize={self.resize!r}, "
+                f"crop={self.crop!r}, grayscale={self.grayscale!r})")
+
+    def as_dict(self):
+        return {
+            "image_format": self.image_format,
+            "quality": self.quality,
+            "png_compression": self.png_compression,
+            "resize": list(self.resize) if isinstance(self.resize, tuple) else self.resize,
+            "crop": list(self.crop) if self.crop else None,
+            "grayscale": self.grayscale,
+        }
+
+    @property
+    def extension(self):
+        return IMAGE_EXTENSIONS[self.image_format]
+
+    def params(self):
+        if self.image_format == "jpg":
+            return [int(cv2.IMWRITE_JPEG_QUALITY), self.quality or JPEG_QUALITY]
+        if self.image_format == "png":
+            return [int(cv2.IMWRITE_PNG_COMPRESSION), self.png_compression]
+        if self.image_format == "webp":
+            return [int(cv2.IMWRITE_WEBP_QUALITY), self.quality or WEBP_QUALITY]
+        return []
+
+    def target_size(self, width, height):
+        if isinstance(self.resize, tuple):
+            target_width, target_height = self.resize
+            if target_width <= 0:
+                target_width = max(1, round(width * target_height / height))
+            if target_height <= 0:
+                target_height = max(1, round(height * target_width / width))
+            return target_width, target_height
+        return max(1, round(width * self.resize)), max(1, round(height * self.resize))
+
+    def output_size(self, width, height):
+        if self.resize is None:
+            return width, height
+        return self.target_size(width, height)
+
+    def prepare(self, frame):
+        if self.crop is not None:
+            x, y, width, height = self.crop
+            frame = frame[y:y + height, x:x + width]
+            if frame.size == 0:
+                raise ValueError(f"Crop region {self.crop} is outside the frame")
+        if self.grayscale and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def transform(self, frame):
+        frame = self.prepare(frame)
+        size = self.output_size(frame.shape[1], frame.shape[0])
+        if size != (frame.shape[1], frame.shape[0]):
+            frame = cv2.resize(frame, size, interpolation=self.interpolation)
+        return frame
+
+    def encode(self, frame):
+        if self.image_format == "raw":
+            buffer = io.BytesIO()
+            np.save(buffer, np.ascontiguousarray(frame))
+            return np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+        ret, encoded = cv2.imencode(f".{self.extension}", frame, self.params())
+        if not ret:
+            raise IOError(f"Failed to encode frame as {self.image_format}")
+        return encoded
+
+    def write(self, frame, filename):
+        write_bytes(self.encode(frame), filename)
+        return True
+
+
+def write_bytes(data, filename):
+    with open(filename, "wb") as f:
+        f.write(memoryview(data).cast("B"))
+
+
+def transform_frames(settings_list, frame):
+    """Apply several output settings to one decoded frame.
+
+    Outputs are produced from the largest to the smallest, and each one is resized from the
+    smallest already-produced image of the same crop and colour that is still large enough, so a
+    thumbnail is scaled down from the preview rather than from the full frame.
+    """
+    if len(settings_list) == 1:
+        return [settings_list[0].transform(frame)]
+
+    bases = {}
+    plans = []
+    for position, settings in enumerate(settings_list):
+        key = (settings.crop, settings.grayscale)
+        if key not in bases:
+            bases[key] = settings.prepare(frame)
+        base = bases[key]
+        size = settings.output_size(base.shape[1], base.shape[0])
+        plans.append((size[0] * size[1], position, key, size))
+
+    results = [None] * len(settings_list)
+    produced = {}
+    for _, position, key, size in sorted(plans, key=lambda plan: (-plan[0], plan[1])):
+        source = bases[key]
+        for image in produced.get(key, ()):
+            if image.shape[1] >= size[0] and image.shape[0] >= size[1]:
+                source = image
+        if (source.shape[1], source.shape[0]) != size:
+            source = cv2.resize(source, size, interpolation=settings_list[position].interpolation)
+        produced.setdefault(key, []).append(source)
+        results[position] = source
+    return results
+
+
+class OutputTarget:
+    def __init__(self, output_dir, settings=None, output_format="files"):
+        self.output_dir = output_dir
+        self.settings = settings or OutputSettings()
+        self.output_format = output_format
+
+    def __repr__(self):
+        return f"OutputTarget({self.output_dir!r}, {self.settings!r}, output_format={self.output_format!r})"
+
+    def as_dict(self):
+        return {"output": self.output_dir, "output_format": self.output_format, **self.settings.as_dict()}
+
+    def resolve(self, base_dir):
+        return OutputTarget(os.path.join(base_dir, self.output_dir), self.settings, self.output_format)
+
+
+def parse_target(text, base_settings=None, output_format="files"):
+    """Parse ``DIR[:SIZE[:FORMAT[:QUALITY]]]``; empty fields keep the job's own settings."""
+    fields = text.split(":")
+    if len(fields) > 1 and len(fields[0]) == 1 and fields[1][:1] in ("\\", "/"):
+        fields[:2] = [f"{fields[0]}:{fields[1]}"]
+    if not fields[0] or len(fields) > 4:
+        raise ValueError(f"Invalid output target (DIR[:SIZE[:FORMAT[:QUALITY]]]): {text}")
+    fields += [""] * (4 - len(fields))
+    output_dir, size, image_format, quality = fields
+
+    settings = copy.copy(base_settings or OutputSettings())
+    if size:
+        settings.resize = parse_size(size)
+    if image_format:
+        settings = OutputSettings(image_format, settings.quality, settings.png_compression, settings.resize,
+                                  settings.crop, settings.grayscale, settings.interpolation)
+    if quality:
+        settings = OutputSettings(settings.image_format, int(quality), settings.png_compression, settings.resize,
+                                  settings.crop, settings.grayscale, settings.interpolation)
+    return OutputTarget(output_dir, settings, output_format)
+
+
+def decode_image(data, extension):
+    if extension == "npy":
+        return np.load(io.BytesIO(data))
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
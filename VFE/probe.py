@@ -0,0 +1,225 @@
+import atexit
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .seekindex import file_signature, load_or_build_index
+
+PROBE_VERSION = 1
+DEFAULT_PROBE_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "VFE", "probe.json")
+PROBE_WORKERS = 8
+SAVE_INTERVAL = 30.0
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def fourcc_text(value):
+    value = int(value)
+    text = "".join(chr((value >> shift) & 0xFF) for shift in (0, 8, 16, 24))
+    return text.strip("\0 ") if text.isprintable() else str(value)
+
+
+class VideoInfo:
+    def __init__(self, path, size, mtime_ns, frame_count, fps, width, height, codec, exact_frame_count=None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.frame_count = frame_count
+        self.exact_frame_count = exact_frame_count
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.codec = codec
+
+    def __repr__(self):
+        return (f"VideoInfo({self.path!r}, frames={self.frames}, fps={self.fps:g}, "
+                f"{self.width}x{self.height}, codec={self.codec!r})")
+
+    @property
+    def frames(self):
+        return self.frame_count if self.exact_frame_count is None else self.exact_frame_count
+
+    @property
+    def exact(self):
+        return self.exact_frame_count is not None
+
+    @property
+    def duration(self):
+        return self.frames / self.fps if self.fps > 0 else 0.0
+
+    def matches(self, signature):
+        return self.size == signature["size"] and self.mtime_ns == signature["mtime_ns"]
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "frame_count": self.frame_count,
+            "exact_frame_count": self.exact_frame_count,
+            "fps": self.fps,
+            "width": self.width,
+            "height": self.height,
+            "codec": self.codec,
+            "duration": round(self.duration, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["path"], data["size"], data["mtime_ns"], data["frame_count"], data["fps"],
+                   data["width"], data["height"], data["codec"], data.get("exact_frame_count"))
+
+
+def probe_video(video_path, exact=False, index_dir=None):
+    signature = file_signature(video_path)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Cannot open video file: {video_path}")
+        info = VideoInfo(signature["path"], signature["size"], signature["mtime_ns"],
+                         int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS),
+                         int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                         fourcc_text(cap.get(cv2.CAP_PROP_FOURCC)))
+    finally:
+        cap.release()
+    if exact:
+        count_frames(info, index_dir)
+    return info
+
+
+def count_frames(info, index_dir=None):
+    # The counting pass decodes every packet anyway, so keep its result as the cached seek index too.
+    index = load_or_build_index(info.path, index_dir)
+    info.exact_frame_count = index.frame_count
+    return info
+
+
+class ProbeCache:
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PROBE_CACHE
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.entries = None
+        self.changed = set()
+        self.saved = time.monotonic()
+
+    def load(self):
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == PROBE_VERSION:
+                entries = {path: VideoInfo.from_dict(info) for path, info in data.get("videos", {}).items()}
+        except (OSError, ValueError, KeyError):
+            pass
+        return entries
+
+    def get(self, video_path, signature=None):
+        signature = signature or file_signature(video_path)
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.load()
+            info = self.entries.get(signature["path"])
+        return info if info is not None and info.matches(signature) else None
+
+    def put(self, info):
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.load()
+            self.entries[info.path] = info
+            self.changed.add(info.path)
+
+    def save_due(self):
+        return bool(self.changed) and time.monotonic() - self.saved >= SAVE_INTERVAL
+
+    def save(self):
+        # Rewriting a large cache takes a while, so lookups are only blocked while the entries are copied.
+        with self.save_lock:
+            with self.lock:
+                changed = {path: self.entries[path] for path in self.changed}
+            if not changed:
+                return
+            # Merge with what other processes wrote since we loaded, our own entries win.
+            entries = self.load()
+            entries.update(changed)
+            data = {"version": PROBE_VERSION, "videos": {path: info.as_dict() for path, info in entries.items()}}
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except OSError:
+                return
+            finally:
+                self.saved = time.monotonic()
+            with self.lock:
+                entries.update({path: self.entries[path] for path in self.changed})
+                self.entries = entries
+                self.changed.difference_update(path for path, info in changed.items() if self.entries[path] is info)
+
+    def save_if_due(self):
+        if self.save_due():
+            self.save()
+
+
+def get_probe_cache(path=None):
+    path = os.path.abspath(path or DEFAULT_PROBE_CACHE)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ProbeCache(path)
+        return cache
+
+
+@atexit.register
+def save_probe_caches():
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.save()
+
+
+def probe(video_path, exact=False, cache=None, index_dir=None, save=True):
+    """Probe one video through the cache.
+
+    With ``save=False`` new entries are written at most every ``SAVE_INTERVAL`` seconds and at exit,
+    which keeps per-job probes from rewriting the whole cache file each time.
+    """
+    cache = cache or get_probe_cache()
+    signature = file_signature(video_path)
+    info = cache.get(video_path, signature)
+    if info is not None and (info.exact or not exact):
+        return info
+    if info is not None:
+        count_frames(info, index_dir)
+    else:
+        info = probe_video(video_path, exact, index_dir)
+    cache.put(info)
+    if save:
+        cache.save()
+    else:
+        cache.save_if_due()
+    return info
+
+
+def probe_many(video_paths, exact=False, workers=PROBE_WORKERS, cache=None, index_dir=None):
+    """Probe videos concurrently; returns ``(path, VideoInfo or exception)`` pairs in input order."""
+    cache = cache or get_probe_cache()
+
+    def probe_one(video_path):
+        try:
+            return video_path, probe(video_path, exact, cache, index_dir, save=False)
+        except Exception as e:
+            return video_path, e
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="VFE-probe") as executor:
+            return list(executor.map(probe_one, video_paths))
+    finally:
+        cache.save()
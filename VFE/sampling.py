@@ -0,0 +1,73 @@
+SAMPLING_MODES = ("all", "stride", "fps", "frames", "times")
+
+
+class Sampling:
+    def __init__(self, mode="all", value=None):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        if mode == "stride" and (not isinstance(value, int) or value < 1):
+            raise ValueError("Stride must be a positive integer")
+        if mode == "fps" and (value is None or value <= 0):
+            raise ValueError("Sampling fps must be positive")
+        if mode in ("frames", "times") and not value:
+            raise ValueError("Frame/timestamp list must not be empty")
+        self.mode = mode
+        self.value = value
+
+    @classmethod
+    def every(cls, stride):
+        return cls("stride", stride)
+
+    @classmethod
+    def per_second(cls, fps):
+        return cls("fps", fps)
+
+    @classmethod
+    def frames(cls, frame_numbers):
+        return cls("frames", list(frame_numbers))
+
+    @classmethod
+    def times(cls, seconds):
+        return cls("times", list(seconds))
+
+    def __repr__(self):
+        return f"Sampling({self.mode!r}, {self.value!r})"
+
+    def frame_numbers(self, start, end, video_fps=None):
+        if self.mode == "all":
+            return range(start, end + 1)
+        if self.mode == "stride":
+            return range(start, end + 1, self.value)
+        if self.mode == "frames":
+            return sorted({n for n in self.value if start <= n <= end})
+
+        if not video_fps or video_fps <= 0:
+            raise ValueError("Video fps is unknown, cannot sample by time")
+        if self.mode == "times":
+            return sorted({round(t * video_fps) for t in self.value if start <= round(t * video_fps) <= end})
+
+        step = video_fps / self.value
+        numbers = []
+        k = 0
+        while True:
+            frame_number = start + round(k * step)
+            if frame_number > end:
+                break
+            if not numbers or frame_number != numbers[-1]:
+                numbers.append(frame_number)
+            k += 1
+        return numbers
+
+
+def parse_number_list(text, cast=int):
+    values = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if cast is int and "-" in part[1:]:
+            first, last = part.split("-", 1)
+            values.extend(range(int(first), int(last) + 1))
+        else:
+            values.append(cast(part))
+    return values
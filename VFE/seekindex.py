@@ -0,0 +1,92 @@
+import bisect
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "VFE", "index")
+
+
+def file_signature(video_path):
+    stat = os.stat(video_path)
+    return {"path": os.path.abspath(video_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def index_path(video_path, index_dir=None):
+    signature = file_signature(video_path)
+    key = hashlib.sha1(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(index_dir or DEFAULT_INDEX_DIR, f"{key}.npz")
+
+
+class SeekIndex:
+    def __init__(self, signature, pts, keyframes):
+        self.signature = signature
+        self.pts = np.asarray(pts, dtype=np.int64)
+        self.keyframes = [int(k) for k in keyframes] or [0]
+
+    @property
+    def frame_count(self):
+        return len(self.pts)
+
+    def keyframe_before(self, frame_number):
+        position = bisect.bisect_right(self.keyframes, frame_number) - 1
+        return self.keyframes[max(0, position)]
+
+    @classmethod
+    def build(cls, video_path, stop_event=None):
+        signature = file_signature(video_path)
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                raise IOError(f"Cannot open video file: {video_path}")
+            key_prop = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+            pts = []
+            keyframes = []
+            while cap.grab():
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                if key_prop is not None and cap.get(key_prop):
+                    keyframes.append(len(pts))
+                pts.append(int(cap.get(cv2.CAP_PROP_PTS)))
+        finally:
+            cap.release()
+        return cls(signature, pts, keyframes)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != INDEX_VERSION:
+                return None
+            return cls(meta["signature"], data["pts"], data["keyframes"].tolist())
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps({"version": INDEX_VERSION, "signature": self.signature})
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, meta=np.array(meta), pts=self.pts,
+                                keyframes=np.asarray(self.keyframes, dtype=np.int64))
+        os.replace(tmp_path, path)
+
+
+def load_or_build_index(video_path, index_dir=None, stop_event=None):
+    path = index_path(video_path, index_dir)
+    if os.path.exists(path):
+        try:
+            index = SeekIndex.load(path)
+            if index is not None and index.signature == file_signature(video_path):
+                return index
+        except Exception:
+            pass
+
+    index = SeekIndex.build(video_path, stop_event)
+    if index is not None:
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    return index
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch import BatchJob, BatchRunner, find_videos, job_output_dir
+from .seekindex import file_signature
+
+STATE_FILENAME = "watch_state.json"
+STATE_VERSION = 1
+POLL_INTERVAL = 2.0
+SETTLE_SECONDS = 5.0
+
+
+class WatchState:
+    def __init__(self, path):
+        self.path = path
+        self.videos = {}
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") == STATE_VERSION:
+            self.videos = data.get("videos", {})
+
+    def is_processed(self, signature):
+        record = self.videos.get(signature["path"])
+        return (record is not None and record["status"] in ("done", "failed")
+                and record["size"] == signature["size"] and record["mtime_ns"] == signature["mtime_ns"])
+
+    def output_dir(self, path):
+        with self.lock:
+            return self.videos.get(path, {}).get("output")
+
+    def output_dirs(self):
+        with self.lock:
+            return {record["output"] for record in self.videos.values() if record.get("output")}
+
+    def record(self, signature, job):
+        with self.lock:
+            self.videos[signature["path"]] = {
+                "size": signature["size"],
+                "mtime_ns": signature["mtime_ns"],
+                **job.as_dict(),
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S") if job.status in ("done", "failed") else None,
+            }
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": STATE_VERSION, "videos": self.videos}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class FolderWatcher:
+    """Poll a directory and extract every video that has finished arriving, once per file version.
+
+    A file is ready when its size and mtime stop changing for ``settle_seconds`` (files that were
+    already that old when first seen are ready at once). Writers that use a temporary name and
+    rename on completion are covered too, since only video extensions are picked up.
+    """
+
+    def __init__(self, source, output_root, start=0, end=None, sampling=None, frame_filter=None,
+                 recursive=False, poll_interval=POLL_INTERVAL, settle_seconds=SETTLE_SECONDS,
+                 state_path=None, runner=None, on_job_update=None):
+        self.source = source
+        self.output_root = output_root
+        self.start = start
+        self.end = end
+        self.sampling = sampling
+        self.frame_filter = frame_filter
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.state = WatchState(state_path or os.path.join(output_root, STATE_FILENAME))
+        self.runner = runner or BatchRunner(resume=True)
+        self.on_job_update = on_job_update
+        self.candidates = {}
+        self.active = set()
+        self.videos = []
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+        self.runner.stop()
+
+    def output_dir(self, video_path):
+        # A changed video is extracted again into the directory it already has.
+        recorded = self.state.output_dir(os.path.abspath(video_path))
+        if recorded:
+            return recorded
+        # Same naming as batch: videos sharing a stem all keep their extension (a_mp4, a_avi), and a
+        # directory already given to another video is never reused.
+        output_dir = job_output_dir(self.output_root, self.source, video_path)
+        same_stem = any(other != video_path and job_output_dir(self.output_root, self.source, other) == output_dir
+                        for other in self.videos)
+        if same_stem or output_dir in self.state.output_dirs():
+            output_dir = job_output_dir(self.output_root, self.source, video_path, keep_extension=True)
+        return output_dir
+
+    def ready_videos(self):
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        self.videos = find_videos(self.source, self.recursive)[1]
+        for video_path in self.videos:
+            try:
+                signature = file_signature(video_path)
+                stat = os.stat(video_path)
+            except OSError:
+                continue
+            path = signature["path"]
+            seen.add(path)
+            if path in self.active or signature["size"] == 0 or self.state.is_processed(signature):
+                continue
+            version = (signature["size"], signature["mtime_ns"])
+            previous = self.candidates.get(path)
+            if previous is None or previous[0] != version:
+                # Files already untouched for the settle time (e.g. found after a restart) need no second look.
+                first_seen = now - self.settle_seconds if time.time() - stat.st_mtime >= self.settle_seconds else now
+                self.candidates[path] = (version, first_seen)
+                previous = self.candidates[path]
+            if now - previous[1] >= self.settle_seconds:
+                ready.append((video_path, signature))
+        for path in set(self.candidates) - seen:
+            del self.candidates[path]
+        return ready
+
+    def submit(self, executor, video_path, signature):
+        # The output directory is chosen and recorded here on the polling thread, so videos that become
+        # ready in the same scan cannot be given the same directory.
+        job = BatchJob(video_path, self.output_dir(video_path), self.start, self.end)
+        self.state.record(signature, job)
+        self.active.add(signature["path"])
+        return executor.submit(self.process, job, signature)
+
+    def process(self, job, signature):
+        self.runner.run_job(job, self.sampling, self.frame_filter)
+        self.state.record(signature, job)
+        if self.on_job_update is not None:
+            self.on_job_update(job)
+        return job
+
+    def run(self, once=False):
+        self.stop_event.clear()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.runner.concurrency, thread_name_prefix="VFE-watch") as executor:
+            try:
+                while not self.stop_event.is_set():
+                    for video_path, signature in self.ready_videos():
+                        futures[self.submit(executor, video_path, signature)] = signature["path"]
+                    for future in [future for future in futures if future.done()]:
+                        path = futures.pop(future)
+                        self.active.discard(path)
+                        self.candidates.pop(path, None)
+                        future.result()
+                    # --once exits when every video present at the start has settled and been extracted.
+                    if once and not futures and not self.candidates:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+            except BaseException:
+                self.stop()
+                raise
@@ -0,0 +1,8 @@
+import pytest
+
+from VFE.benchmark import VideoSpec, generate_video
+
+
+@pytest.fixture(scope="session")
+def video(tmp_path_factory):
+    return generate_video(VideoSpec(160, 120, frames=60), str(tmp_path_factory.mktemp("videos")))
@@ -0,0 +1,64 @@
+import numpy as np
+
+from VFE.archive import ARCHIVE_INDEX, ARCHIVE_META, ArchiveWriter, FrameArchive, merge_archive_parts, part_name
+
+
+def frame(value, shape=(8, 12, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_merge_archive_parts_shards(tmp_path):
+    output_dir = str(tmp_path)
+    for part, frames in ((1, range(0, 4)), (2, range(4, 7))):
+        writer = ArchiveWriter(output_dir, "shards", extension="bin", part=part)
+        for frame_number in frames:
+            writer.append(frame_number, bytes([frame_number]) * (frame_number + 1))
+        writer.close()
+
+    merge_archive_parts(output_dir, [1, 2])
+    for part in (1, 2):
+        for name in (ARCHIVE_META, ARCHIVE_INDEX):
+            assert not (tmp_path / part_name(name, part)).exists()
+    with FrameArchive(output_dir) as archive:
+        assert archive.frame_numbers() == list(range(7))
+        assert all(archive.read_bytes(n) == bytes([n]) * (n + 1) for n in range(7))
+
+
+def test_merge_archive_parts_appends_to_existing_archive(tmp_path):
+    output_dir = str(tmp_path)
+    writer = ArchiveWriter(output_dir, "npy")
+    writer.append(0, frame(0))
+    writer.close()
+    writer = ArchiveWriter(output_dir, "npy", part=1)
+    writer.append(1, frame(1))
+    writer.close()
+
+    merge_archive_parts(output_dir, [1])
+    with FrameArchive(output_dir) as archive:
+        assert archive.frame_numbers() == [0, 1]
+        assert archive.read(1)[0, 0, 0] == 1
+
+
+def test_npy_arrays_roll_over_and_hold_only_written_rows(tmp_path):
+    output_dir = str(tmp_path)
+    writer = ArchiveWriter(output_dir, "npy", shard_size=frame(0).nbytes * 4, capacity=100)
+    for frame_number in range(6):
+        writer.append(frame_number, frame(frame_number))
+    writer.close()
+
+    shapes = [np.load(tmp_path / name, mmap_mode="r").shape[0] for name in writer.files]
+    assert shapes == [4, 2]
+    with FrameArchive(output_dir) as archive:
+        assert [int(data[0, 0, 0]) for _, data in archive] == list(range(6))
+
+
+def test_reopened_npy_archive_trims_rows_left_by_an_interrupted_writer(tmp_path):
+    output_dir = str(tmp_path)
+    writer = ArchiveWriter(output_dir, "npy", capacity=50)
+    for frame_number in range(3):
+        writer.append(frame_number, frame(frame_number))
+    writer.checkpoint()
+    assert np.load(tmp_path / writer.files[0], mmap_mode="r").shape[0] == 50
+
+    ArchiveWriter(output_dir, "npy").close()
+    assert np.load(tmp_path / writer.files[0], mmap_mode="r").shape[0] == 3
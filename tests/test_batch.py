@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from VFE.batch import BatchJob, BatchRunner, assign_output_dirs
+from VFE.engine import ExtractionError
+
+
+def output_names(jobs):
+    return [os.path.basename(job.output_dir) for job in jobs]
+
+
+def test_output_dirs_keep_extension_only_for_shared_stems(tmp_path):
+    jobs = [BatchJob(str(tmp_path / name), None) for name in ("a.mp4", "a.avi", "b.mp4")]
+    assert output_names(assign_output_dirs(jobs, "out", str(tmp_path))) == ["a_mp4", "a_avi", "b"]
+
+
+def test_same_video_with_several_ranges_gets_a_directory_per_range(tmp_path):
+    video = str(tmp_path / "a.mp4")
+    jobs = [BatchJob(video, None, 0, 99), BatchJob(video, None, 150, None), BatchJob(str(tmp_path / "b.mp4"), None)]
+    assert output_names(assign_output_dirs(jobs, "out", str(tmp_path))) == ["a_mp4_0-99", "a_mp4_150-end", "b"]
+
+
+def test_entries_writing_to_one_directory_are_rejected(tmp_path):
+    video = str(tmp_path / "a.mp4")
+    with pytest.raises(ExtractionError):
+        assign_output_dirs([BatchJob(video, None, 0, 9), BatchJob(video, None, 0, 9)], "out", str(tmp_path))
+    with pytest.raises(ExtractionError):
+        assign_output_dirs([BatchJob(video, os.path.join("out", "b")), BatchJob(str(tmp_path / "b.mp4"), None)],
+                           "out", str(tmp_path))
+
+
+def test_thread_budget_is_split_between_decoders_and_encoders():
+    runner = BatchRunner(concurrency=4, threads=16)
+    assert runner.job_options()["decoder_threads"] == 2 and runner.workers_per_job == 2
+    runner = BatchRunner(concurrency=4, threads=16, decoder_threads=1)
+    assert runner.job_options()["decoder_threads"] == 1 and runner.workers_per_job == 3
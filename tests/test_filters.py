@@ -0,0 +1,26 @@
+import numpy as np
+
+from VFE.filters import FrameFilter
+
+
+def frames(*values):
+    return [np.full((36, 64, 3), value, dtype=np.uint8) for value in values]
+
+
+def test_dedupe_compares_with_the_last_kept_frame():
+    # A slow drift never differs enough from its neighbour, but it does from the last kept frame.
+    frame_filter = FrameFilter("dedupe", "mad", 10)
+    assert [frame_filter.accept(frame) for frame in frames(0, 6, 12, 18, 24)] == [True, False, True, False, True]
+
+
+def test_scenes_compares_with_the_previous_frame():
+    frame_filter = FrameFilter("scenes", "mad", 10)
+    assert [frame_filter.accept(frame) for frame in frames(0, 6, 12, 18, 100, 104)] == [
+        True, False, False, False, True, False]
+
+
+def test_reset_keeps_the_next_frame():
+    frame_filter = FrameFilter("dedupe", "mad", 10)
+    frame_filter.accept(frames(0)[0])
+    frame_filter.reset()
+    assert frame_filter.accept(frames(0)[0])
@@ -0,0 +1,50 @@
+from VFE.manifest import CompletionManifest, manifest_filename, merge_ranges
+
+
+def test_merge_ranges_joins_overlapping_and_adjacent():
+    assert merge_ranges([[10, 12], [0, 3], [4, 5], [2, 4], [20, 20]]) == [[0, 5], [10, 12], [20, 20]]
+
+
+def test_merge_ranges_keeps_gaps():
+    assert merge_ranges([[0, 1], [3, 4]]) == [[0, 1], [3, 4]]
+    assert merge_ranges([]) == []
+
+
+def test_missing_skips_recorded_frames(tmp_path):
+    manifest = CompletionManifest(str(tmp_path))
+    for frame_number in (0, 1, 2, 5, 9, 8):
+        manifest.add(frame_number)
+    assert manifest.missing(range(12)) == [3, 4, 6, 7, 10, 11]
+    assert manifest.missing([1, 4, 8, 30]) == [4, 30]
+    assert manifest.count == 6
+    assert 8 in manifest and 7 not in manifest
+
+
+def test_missing_without_ranges_returns_input(tmp_path):
+    frame_numbers = range(0, 10, 2)
+    assert CompletionManifest(str(tmp_path)).missing(frame_numbers) is frame_numbers
+
+
+def test_load_requires_matching_identity(tmp_path):
+    manifest = CompletionManifest(str(tmp_path), {"video": "a"})
+    manifest.add(0)
+    manifest.add(1)
+    manifest.save()
+
+    assert CompletionManifest.load(str(tmp_path), {"video": "a"}).ranges == [[0, 1]]
+    assert CompletionManifest.load(str(tmp_path), {"video": "b"}).ranges == []
+
+
+def test_merge_parts_collects_and_removes_part_files(tmp_path):
+    identity = {"video": "a"}
+    for part, frames in ((1, range(0, 5)), (2, range(5, 8))):
+        manifest = CompletionManifest(str(tmp_path), identity, part)
+        for frame_number in frames:
+            manifest.add(frame_number)
+        manifest.save()
+
+    manifest = CompletionManifest.load(str(tmp_path), identity)
+    manifest.merge_parts(str(tmp_path), [1, 2, 3])
+    assert manifest.missing(range(10)) == [8, 9]
+    assert not (tmp_path / manifest_filename(1)).exists()
+    assert not (tmp_path / manifest_filename(2)).exists()
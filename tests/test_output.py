@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from VFE import output
+from VFE.output import OutputSettings, parse_target, transform_frames
+
+
+def test_each_output_is_resized_from_the_smallest_large_enough_image(monkeypatch):
+    resized = []
+    resize = output.cv2.resize
+
+    def recording_resize(image, size, **kwargs):
+        resized.append(((image.shape[1], image.shape[0]), size))
+        return resize(image, size, **kwargs)
+
+    monkeypatch.setattr(output.cv2, "resize", recording_resize)
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    settings = [OutputSettings(resize=(160, 90)), OutputSettings(), OutputSettings(resize=(640, 360)),
+                OutputSettings(resize=(320, 180))]
+    results = transform_frames(settings, frame)
+
+    assert [(image.shape[1], image.shape[0]) for image in results] == [(160, 90), (1280, 720), (640, 360), (320, 180)]
+    assert results[1] is frame
+    assert resized == [((1280, 720), (640, 360)), ((640, 360), (320, 180)), ((320, 180), (160, 90))]
+
+
+def test_outputs_with_another_crop_or_colour_start_from_their_own_base():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    small, gray = transform_frames([OutputSettings(resize=(320, 180)), OutputSettings(resize=(640, 360), grayscale=True)],
+                                   frame)
+    assert small.shape == (180, 320, 3)
+    assert gray.shape == (360, 640)
+
+
+def test_parse_target_fields_override_the_job_settings():
+    base = OutputSettings("png", png_compression=5, grayscale=True)
+    target = parse_target("thumbs:160x0:webp:70", base)
+    assert target.output_dir == "thumbs"
+    assert (target.settings.image_format, target.settings.quality, target.settings.resize) == ("webp", 70, (160, 0))
+    assert target.settings.grayscale
+
+    target = parse_target("preview::", base)
+    assert target.settings.image_format == "png" and target.settings.resize is None
+    assert base.resize is None
+
+
+@pytest.mark.parametrize("text, directory", [
+    ("C:\\out\\thumbs:0.5", "C:\\out\\thumbs"),
+    ("D:/frames:320x180:jpg:80", "D:/frames"),
+    ("C:\\out", "C:\\out"),
+])
+def test_parse_target_keeps_windows_drive_letters(text, directory):
+    assert parse_target(text).output_dir == directory
+
+
+@pytest.mark.parametrize("text", [":160x0", "a:1:jpg:90:extra", "thumbs:abc"])
+def test_parse_target_rejects_invalid_specs(text):
+    with pytest.raises(ValueError):
+        parse_target(text)
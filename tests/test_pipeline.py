@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from VFE.engine import FrameExtractor
+
+
+def read_outputs(output_dir):
+    files = {}
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            if name.endswith((".jpg", ".png", ".npy", ".vfa")):
+                with open(os.path.join(root, name), "rb") as f:
+                    files[os.path.relpath(os.path.join(root, name), output_dir)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("output_format", ["files", "shards"])
+def test_pipelined_output_is_byte_identical_to_serial(tmp_path, video, output_format):
+    outputs = []
+    for workers in (1, 4):
+        output_dir = str(tmp_path / f"w{workers}")
+        extractor = FrameExtractor(language="en-US", workers=workers, queue_size=3, output_format=output_format,
+                                   probe_cache=str(tmp_path / "probe.json"))
+        assert extractor.run_job(video, output_dir) == 60
+        outputs.append(read_outputs(output_dir))
+    assert outputs[0] and outputs[0] == outputs[1]
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from VFE.archive import FrameArchive
+from VFE.engine import ExtractionError, FrameExtractor, find_part_numbers
+from VFE.filters import FrameFilter
+from VFE.framelog import FrameLog
+from VFE.manifest import CompletionManifest
+
+
+def saved_images(output_dir):
+    return sorted(name for _, _, files in os.walk(output_dir) for name in files if name.endswith(".jpg"))
+
+
+def extractor(tmp_path, **options):
+    return FrameExtractor(language="en-US", probe_cache=str(tmp_path / "probe.json"), **options)
+
+
+def test_resume_after_interrupted_segmented_run(tmp_path, video):
+    output_dir = str(tmp_path / "out")
+    os.makedirs(output_dir)
+    # A segment worker that finished before the run was killed leaves only its part files behind.
+    extractor(tmp_path, part=1).process_video(video, output_dir, 0, 29)
+    assert find_part_numbers(output_dir) == [1]
+
+    resumed = extractor(tmp_path, processes=2, resume=True)
+    assert resumed.run_job(video, output_dir) == 30
+    assert find_part_numbers(output_dir) == []
+    assert len(saved_images(output_dir)) == 60
+    manifest = CompletionManifest.load(output_dir, resumed.job_identity(video))
+    assert manifest.ranges == [[0, 59]]
+
+
+def test_resume_after_stop_with_archive_output(tmp_path, video):
+    output_dir = str(tmp_path / "out")
+    stopped = None
+
+    def stop_early(current, total):
+        if current >= 20:
+            stopped.stop()
+
+    stopped = extractor(tmp_path, output_format="shards", resume=True, on_progress=stop_early, progress_interval=10)
+    first = stopped.run_job(video, output_dir)
+    assert stopped.stopped and 20 <= first < 60
+
+    resumed = extractor(tmp_path, output_format="shards", resume=True)
+    assert resumed.run_job(video, output_dir) == 60 - first
+    with FrameArchive(output_dir) as archive:
+        assert archive.frame_numbers() == list(range(60))
+        assert len(archive.index) == 60
+
+
+def test_changed_settings_do_not_resume(tmp_path, video):
+    output_dir = str(tmp_path / "out")
+    extractor(tmp_path, resume=True).run_job(video, output_dir, 0, 9)
+
+    assert extractor(tmp_path, resume=True).run_job(video, output_dir, 0, 9) == 0
+    assert extractor(tmp_path, resume=True, output_format="shards").run_job(video, output_dir, 0, 9) == 10
+
+
+def test_frames_dropped_by_a_filter_are_not_skipped_without_it(tmp_path, video):
+    output_dir = str(tmp_path / "out")
+    filtered = extractor(tmp_path, resume=True)
+    saved = filtered.run_job(video, output_dir, 0, 29, frame_filter=FrameFilter("dedupe", "mad", 100))
+    assert filtered.dropped_count > 0 and saved + filtered.dropped_count == 30
+
+    assert extractor(tmp_path, resume=True).run_job(video, output_dir, 0, 29) == 30
+    assert len(saved_images(output_dir)) == 30
+
+
+def test_failed_log_close_still_saves_archive_and_manifest(tmp_path, video, monkeypatch):
+    output_dir = str(tmp_path / "out")
+
+    def full_disk(self):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(FrameLog, "close", full_disk)
+    failing = extractor(tmp_path, output_format="shards", resume=True)
+    with pytest.raises(ExtractionError, match="No space left"):
+        failing.run_job(video, output_dir, 0, 9)
+    monkeypatch.undo()
+
+    with FrameArchive(output_dir) as archive:
+        assert archive.frame_numbers() == list(range(10))
+    assert CompletionManifest.load(output_dir, failing.job_identity(video)).ranges == [[0, 9]]
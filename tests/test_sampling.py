@@ -0,0 +1,31 @@
+import pytest
+
+from VFE.sampling import Sampling, parse_number_list
+
+
+def test_fps_sampling_rounds_steps_from_the_start_frame():
+    assert Sampling.per_second(10).frame_numbers(0, 10, 25) == [0, 2, 5, 8, 10]
+    assert Sampling.per_second(1).frame_numbers(7, 60, 25) == [7, 32, 57]
+
+
+def test_fps_sampling_above_video_fps_does_not_repeat_frames():
+    assert Sampling.per_second(60).frame_numbers(0, 5, 25) == [0, 1, 2, 3, 4, 5]
+
+
+def test_times_sampling_rounds_dedupes_and_clamps_to_range():
+    sampling = Sampling.times([0.0, 0.5, 0.52, 1.0, 1.01, 9.0, 0.2])
+    assert sampling.frame_numbers(5, 30, 25) == [5, 12, 13, 25]
+
+
+def test_time_based_sampling_needs_video_fps():
+    with pytest.raises(ValueError):
+        Sampling.per_second(1).frame_numbers(0, 10, 0)
+
+
+def test_frame_list_is_sorted_deduplicated_and_clamped():
+    assert Sampling.frames([9, 3, 3, 40, 0]).frame_numbers(1, 20) == [3, 9]
+
+
+def test_parse_number_list_expands_ranges():
+    assert parse_number_list("0,120; 300-303") == [0, 120, 300, 301, 302, 303]
+    assert parse_number_list("1.5,60", float) == [1.5, 60.0]
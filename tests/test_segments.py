@@ -0,0 +1,29 @@
+import os
+
+from VFE.engine import FrameExtractor, split_segments
+from VFE.filters import FrameFilter
+
+
+def test_split_segments_covers_every_frame_in_order():
+    segments = split_segments(range(0, 100, 3), 4)
+    assert [len(segment) for segment in segments] == [9, 9, 8, 8]
+    assert [n for segment in segments for n in segment] == list(range(0, 100, 3))
+
+
+def test_split_segments_never_makes_empty_segments():
+    assert split_segments([4, 8], 5) == [[4], [8]]
+
+
+def kept_frames(output_dir):
+    return sorted(name for _, _, files in os.walk(output_dir) for name in files if name.endswith(".jpg"))
+
+
+def test_scene_filter_output_does_not_depend_on_process_count(tmp_path, video):
+    outputs = {}
+    for processes in (1, 3):
+        output_dir = str(tmp_path / f"p{processes}")
+        extractor = FrameExtractor(language="en-US", processes=processes, probe_cache=str(tmp_path / "probe.json"))
+        extractor.run_job(video, output_dir, frame_filter=FrameFilter("scenes", "mad", 5.5))
+        outputs[processes] = kept_frames(output_dir)
+    assert 1 < len(outputs[1]) < 60
+    assert outputs[1] == outputs[3]